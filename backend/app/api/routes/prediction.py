@@ -2,10 +2,11 @@
 
 import uuid
 import io
-from typing import Dict, List
+from datetime import datetime
+from typing import Dict, List, Optional
 
 import pandas as pd
-from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, UploadFile, File
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
@@ -20,7 +21,7 @@ from ...models.ml_model import fraud_model
 from ...services.fraud_detector import FraudDetectorService
 from ...services.data_processor import DataProcessor
 from ...services.auth_service import get_current_user
-from ...services.prediction_service import save_prediction, get_user_predictions, get_user_prediction_stats, save_batch_predictions
+from ...services.prediction_service import save_prediction, get_user_predictions_page, get_user_prediction_stats, save_batch_predictions
 from ...db.database import get_db
 from ...db.models import AuditAction
 from ...services.audit_service import log_action
@@ -58,7 +59,7 @@ async def predict_fraud(
         )
 
     try:
-        result = FraudDetectorService.predict_single(transaction)
+        result = await FraudDetectorService.predict_single_async(transaction)
 
         # Save prediction to database
         save_prediction(db, int(current_user.id), transaction, result)
@@ -95,7 +96,7 @@ async def predict_fraud_batch(
         )
 
     try:
-        return FraudDetectorService.predict_batch(batch.transactions)
+        return await FraudDetectorService.predict_batch_async(batch.transactions)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Batch prediction error: {str(e)}")
 
@@ -106,12 +107,26 @@ async def predict_fraud_batch(
     description="Get the authenticated user's prediction history.",
 )
 async def get_history(
+    response: Response,
     limit: int = 50,
+    before: Optional[datetime] = None,
+    before_id: Optional[int] = None,
     current_user: UserResponse = Depends(get_current_user),
     db: Session = Depends(get_db)
 ) -> List[dict]:
-    """Get the user's prediction history from database."""
-    predictions = get_user_predictions(db, int(current_user.id), limit=limit)
+    """
+    Get the user's prediction history from database.
+
+    Pass the `X-Next-Before` and `X-Next-Before-Id` headers of a page back
+    as `before` and `before_id` to fetch the next (older) page; the headers
+    are absent on the last page.
+    """
+    predictions, cursor = get_user_predictions_page(
+        db, int(current_user.id), limit=limit, before=before, before_id=before_id
+    )
+    if cursor is not None:
+        response.headers["X-Next-Before"] = cursor[0].isoformat()
+        response.headers["X-Next-Before-Id"] = str(cursor[1])
 
     return [
         {
@@ -6,8 +6,9 @@ Copyright (c) 2024 - All Rights Reserved
 """
 
 import io
+import tempfile
 from datetime import datetime, timedelta
-from typing import Optional, Literal
+from typing import BinaryIO, Iterator, Optional, Literal
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
@@ -21,6 +22,21 @@ from ...services.auth_service import get_current_user
 
 router = APIRouter(prefix="/reports", tags=["Reports"])
 
+# Reports larger than this spill from memory to a temporary file
+SPOOL_MAX_BYTES = 1024 * 1024
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+def _iter_chunks(file: BinaryIO) -> Iterator[bytes]:
+    """Yield a file from the start in STREAM_CHUNK_BYTES chunks, then close it"""
+    with file:
+        file.seek(0)
+        while True:
+            chunk = file.read(STREAM_CHUNK_BYTES)
+            if not chunk:
+                break
+            yield chunk
+
 
 def generate_excel_report(
     predictions: list,
@@ -169,8 +185,14 @@ def generate_pdf_report(
     predictions: list,
     user: UserResponse,
     period_days: int
-) -> bytes:
-    """Generate a PDF report"""
+) -> Iterator[bytes]:
+    """
+    Generate a PDF report as a stream of chunks
+
+    The document is written to a spooled temporary file, so a large report
+    goes to disk instead of being held in memory, and is read back chunk
+    by chunk for a StreamingResponse.
+    """
     try:
         from reportlab.lib import colors
         from reportlab.lib.pagesizes import letter, A4
@@ -179,7 +201,7 @@ def generate_pdf_report(
         from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
         from reportlab.lib.enums import TA_CENTER, TA_LEFT
 
-        buffer = io.BytesIO()
+        buffer = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
         doc = SimpleDocTemplate(buffer, pagesize=A4)
         styles = getSampleStyleSheet()
         story = []
@@ -299,12 +321,11 @@ def generate_pdf_report(
         ))
 
         doc.build(story)
-        buffer.seek(0)
-        return buffer.getvalue()
+        return _iter_chunks(buffer)
 
     except ImportError:
         # ReportLab not installed, return simple text
-        return b"PDF generation requires reportlab. Please install it with: pip install reportlab"
+        return iter([b"PDF generation requires reportlab. Please install it with: pip install reportlab"])
 
 
 @router.get(
@@ -410,7 +431,7 @@ async def generate_fraud_summary_report(
     filename = f"fraud_report_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.pdf"
 
     return StreamingResponse(
-        io.BytesIO(pdf_content),
+        pdf_content,
         media_type="application/pdf",
         headers={
             "Content-Disposition": f"attachment; filename={filename}"
@@ -901,7 +922,7 @@ async def generate_batch_report(
     filename = f"batch_report_{batch_id[:8]}.pdf"
 
     return StreamingResponse(
-        io.BytesIO(pdf_content),
+        pdf_content,
         media_type="application/pdf",
         headers={
             "Content-Disposition": f"attachment; filename={filename}"
@@ -27,9 +27,22 @@ class Settings(BaseSettings):
     model_path: str = "models/fraud_detector.pkl"
     scaler_path: str = "models/scaler.pkl"
 
+    # Prediction micro-batching (coalesces concurrent single predictions)
+    prediction_batching_enabled: bool = True
+    prediction_batch_max_size: int = 128
+    prediction_batch_timeout_ms: float = 10.0
+
+    # Prediction cache (keyed by a hash of the feature vector)
+    prediction_cache_enabled: bool = True
+    prediction_cache_max_size: int = 10000
+    prediction_cache_ttl_seconds: int = 60
+
     # Logging
     log_level: str = "INFO"
 
+    # Days of API request logs and system metrics to keep
+    monitoring_retention_days: int = 30
+
     # JWT Authentication
     secret_key: str = "your-super-secret-key-change-in-production-2024"
     refresh_secret_key: str = "your-refresh-secret-key-change-in-production-2024"
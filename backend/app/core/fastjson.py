@@ -0,0 +1,40 @@
+"""
+Fast JSON helpers - orjson when installed, stdlib json otherwise
+
+Both paths produce the same compact output (no whitespace, non-ASCII kept
+as UTF-8), so callers never see which encoder ran.
+
+Author: Zhmuryk Andrii
+Copyright (c) 2024 - All Rights Reserved
+"""
+
+import json
+from typing import Any, Union
+
+# orjson is optional; fall back to the stdlib encoder
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Serialize to UTF-8 JSON bytes"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def dumps(obj: Any) -> str:
+    """Serialize to a JSON string"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Parse JSON from a string or bytes"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,13 @@
+"""
+HTTP/2 support probe for the shared httpx clients
+
+Author: Zhmuryk Andrii
+Copyright (c) 2024 - All Rights Reserved
+"""
+
+# HTTP/2 needs the optional h2 package (pip install httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
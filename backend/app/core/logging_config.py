@@ -5,9 +5,16 @@ Author: Zhmuryk Andrii
 Copyright (c) 2024 - All Rights Reserved
 """
 
+import atexit
 import logging
+import queue
 import sys
-from logging.handlers import RotatingFileHandler, TimedRotatingFileHandler
+from logging.handlers import (
+    QueueHandler,
+    QueueListener,
+    RotatingFileHandler,
+    TimedRotatingFileHandler,
+)
 from pathlib import Path
 import json
 from datetime import datetime
@@ -60,12 +67,40 @@ class ColoredFormatter(logging.Formatter):
         return super().format(record)
 
 
+# Background listeners that drain queued records into the real handlers
+_queue_listeners = []
+
+
+def _stop_queue_listeners():
+    """Flush and stop all background log listeners"""
+    while _queue_listeners:
+        _queue_listeners.pop().stop()
+
+
+atexit.register(_stop_queue_listeners)
+
+
+def _attach_queued(logger: logging.Logger, *handlers: logging.Handler):
+    """
+    Route a logger's records through an in-memory queue.
+
+    The logger only enqueues; a QueueListener thread does the console and
+    file I/O, so callers never block on a slow handler.
+    """
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    _queue_listeners.append(listener)
+
+
 def setup_logging(
     log_level: str = "INFO",
     log_dir: str = "logs",
     json_logs: bool = False,
     max_bytes: int = 10 * 1024 * 1024,  # 10 MB
-    backup_count: int = 5
+    backup_count: int = 5,
+    use_queue: bool = True
 ):
     """
     Configure application logging with rotation.
@@ -76,6 +111,8 @@ def setup_logging(
         json_logs: Whether to use JSON format
         max_bytes: Max size per log file before rotation
         backup_count: Number of backup files to keep
+        use_queue: Hand records to a background thread instead of writing
+            them on the calling thread
     """
     # Create logs directory
     log_path = Path(log_dir)
@@ -86,6 +123,7 @@ def setup_logging(
     root_logger.setLevel(getattr(logging, log_level.upper()))
     
     # Clear existing handlers
+    _stop_queue_listeners()
     root_logger.handlers.clear()
     
     # Console handler with colors (for development)
@@ -100,7 +138,6 @@ def setup_logging(
             datefmt="%Y-%m-%d %H:%M:%S"
         )
     console_handler.setFormatter(console_formatter)
-    root_logger.addHandler(console_handler)
     
     # File handler with rotation (all logs)
     file_handler = RotatingFileHandler(
@@ -115,7 +152,6 @@ def setup_logging(
         datefmt="%Y-%m-%d %H:%M:%S"
     )
     file_handler.setFormatter(file_formatter)
-    root_logger.addHandler(file_handler)
     
     # Error file handler (errors only)
     error_handler = RotatingFileHandler(
@@ -126,7 +162,13 @@ def setup_logging(
     )
     error_handler.setLevel(logging.ERROR)
     error_handler.setFormatter(file_formatter)
-    root_logger.addHandler(error_handler)
+
+    root_handlers = (console_handler, file_handler, error_handler)
+    if use_queue:
+        _attach_queued(root_logger, *root_handlers)
+    else:
+        for handler in root_handlers:
+            root_logger.addHandler(handler)
     
     # Access log handler (daily rotation)
     access_handler = TimedRotatingFileHandler(
@@ -141,7 +183,11 @@ def setup_logging(
     
     # Create access logger
     access_logger = logging.getLogger("access")
-    access_logger.addHandler(access_handler)
+    access_logger.handlers.clear()
+    if use_queue:
+        _attach_queued(access_logger, access_handler)
+    else:
+        access_logger.addHandler(access_handler)
     access_logger.propagate = False
     
     logging.info(f"Logging configured: level={log_level}, json={json_logs}, dir={log_dir}")
@@ -6,7 +6,7 @@ Copyright (c) 2024 - All Rights Reserved
 """
 
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import QueuePool, StaticPool
@@ -32,6 +32,15 @@ if is_sqlite:
     )
 else:
     # PostgreSQL configuration
+    driver_options = {}
+    if make_url(DATABASE_URL).get_driver_name() == "psycopg2":
+        # Turn executemany INSERTs (e.g. batch prediction saves) into
+        # multi-row VALUES statements of up to 1000 rows each
+        driver_options = {
+            "executemany_mode": "values_plus_batch",
+            "insertmanyvalues_page_size": 1000,
+        }
+
     engine = create_engine(
         DATABASE_URL,
         poolclass=QueuePool,
@@ -39,7 +48,8 @@ else:
         max_overflow=10,
         pool_timeout=30,
         pool_recycle=1800,  # Recycle connections after 30 minutes
-        pool_pre_ping=True  # Verify connections before use
+        pool_pre_ping=True,  # Verify connections before use
+        **driver_options
     )
 
 # Create session factory
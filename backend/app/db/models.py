@@ -7,11 +7,13 @@ Copyright (c) 2024 - All Rights Reserved
 
 from datetime import datetime
 from enum import Enum as PyEnum
+from typing import FrozenSet
 
-from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Integer, String, Text, Enum, Table
+from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, String, Text, Enum, Table
 from sqlalchemy.orm import relationship
 
 from .database import Base
+from ..core import fastjson
 
 
 # ============== Enums ==============
@@ -111,6 +113,21 @@ class RefreshToken(Base):
     # Relationship
     user = relationship("User", back_populates="refresh_tokens")
 
+    # Partial indexes for cleanup_expired_tokens: live tokens by expiry,
+    # and revoked tokens on their own so the OR branch is an index scan too
+    __table_args__ = (
+        Index(
+            "ix_refresh_tokens_cleanup", "expires_at",
+            postgresql_where=(is_revoked == False),
+            sqlite_where=(is_revoked == False)
+        ),
+        Index(
+            "ix_refresh_tokens_revoked", "id",
+            postgresql_where=(is_revoked == True),
+            sqlite_where=(is_revoked == True)
+        ),
+    )
+
     def __repr__(self):
         return f"<RefreshToken(id={self.id}, user_id={self.user_id}, revoked={self.is_revoked})>"
 
@@ -147,6 +164,12 @@ class Prediction(Base):
     # Relationship to user
     user = relationship("User", back_populates="predictions")
 
+    # Per-user history is listed newest first and grouped by batch
+    __table_args__ = (
+        Index("ix_pred_user_created", "user_id", "created_at", "id"),
+        Index("ix_pred_user_batch", "user_id", "batch_id"),
+    )
+
     def __repr__(self):
         return f"<Prediction(id={self.id}, is_fraud={self.is_fraud}, probability={self.fraud_probability})>"
 
@@ -230,6 +253,21 @@ class Webhook(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Backs get_user_webhooks (user_id filter, newest first)
+    __table_args__ = (
+        Index("ix_webhooks_user_created", "user_id", created_at.desc()),
+    )
+
+    @property
+    def subscribed_events(self) -> FrozenSet[str]:
+        """Parsed event_types, cached until the column value changes"""
+        raw = self.event_types
+        cached = getattr(self, "_event_cache", None)
+        if cached is None or cached[0] is not raw:
+            cached = (raw, frozenset(fastjson.loads(raw)))
+            self._event_cache = cached
+        return cached[1]
+
     def __repr__(self):
         return f"<Webhook(id={self.id}, name='{self.name}', url='{self.url[:30]}...')>"
 
@@ -27,6 +27,11 @@ from .core.logging_config import setup_logging, RequestLogger
 from .core.security_headers import SecurityHeadersMiddleware
 from .models.ml_model import fraud_model
 from .db.database import init_db
+from .services.fraud_detector import prediction_batcher
+from .services.monitoring_service import monitoring_service
+from .services.notification_service import close_notify_client
+from .services.payment_service import async_paypal_service
+from .services.webhook_service import WebhookService, webhook_retry_queue
 
 # Configure structured logging
 setup_logging(
@@ -70,10 +75,22 @@ async def lifespan(app: FastAPI):
             "Run 'python ml/train.py' to train the model."
         )
 
+    if settings.prediction_batching_enabled:
+        await prediction_batcher.start()
+
+    await monitoring_service.start()
+    await webhook_retry_queue.start()
+
     yield
 
     # Shutdown
     logger.info("Shutting down Fraud Detection API...")
+    await prediction_batcher.stop()
+    await monitoring_service.stop()
+    await close_notify_client()
+    await async_paypal_service.close()
+    await webhook_retry_queue.stop()
+    await WebhookService.close_client()
 
 
 # Create FastAPI application
@@ -132,7 +149,8 @@ app.add_middleware(
     allow_headers=["*"],
     expose_headers=[
         "X-Batch-ID", "X-Total-Rows", "X-Fraud-Count", "X-Legitimate-Count", "Content-Disposition",
-        "X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset", "Retry-After"
+        "X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset", "Retry-After",
+        "X-Next-Before", "X-Next-Before-Id"
     ],
 )
 
@@ -1,6 +1,7 @@
 """Enhanced ML Model with multiple algorithms and advanced features"""
 
 import logging
+import os
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any
 from enum import Enum
@@ -16,6 +17,27 @@ from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Optional: LZ4 gives fast joblib compression for saved artifacts
+try:
+    import lz4  # noqa: F401
+    LZ4_AVAILABLE = True
+except ImportError:
+    LZ4_AVAILABLE = False
+
+# Compression used for retrained artifacts
+ARTIFACT_COMPRESS = ("lz4", 3) if LZ4_AVAILABLE else 0
+
+
+def _atomic_dump(obj: Any, path: Path, compress: Any = 0) -> None:
+    """Dump obj with joblib to a temp file and atomically move it into place"""
+    tmp_path = path.with_name(path.name + ".tmp")
+    try:
+        joblib.dump(obj, tmp_path, compress=compress)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
 
 class ModelType(str, Enum):
     """Available model types"""
@@ -86,12 +108,12 @@ class EnhancedFraudDetectionModel:
 
         # Engineer new features
         amount_log = np.log1p(amount)  # log(1 + amount) to handle zeros
-        time_of_day = (time % 86400) / 3600  # Convert to hours (0-24)
+        time_of_day = (time % 86400.0) / 3600.0  # Convert to hours (0-24)
         amount_per_second = amount / (time + 1)  # Avoid division by zero
         v1_v2_interaction = v1 * v2
         v3_v4_interaction = v3 * v4
         amount_squared = amount ** 2
-        high_amount_flag = (amount > 500).astype(float)
+        high_amount_flag = (amount > 500).astype(amount.dtype)
 
         # Stack all features
         engineered = np.column_stack([
@@ -173,7 +195,7 @@ class EnhancedFraudDetectionModel:
         Train the model with feature engineering
 
         Args:
-            X_train: Training features (n_samples, 30)
+            X_train: Training features (n_samples, 30), float32 is kept as-is
             y_train: Training labels
             X_test: Optional test features for evaluation
             y_test: Optional test labels for evaluation
@@ -223,7 +245,13 @@ class EnhancedFraudDetectionModel:
         return metrics
 
     def load(self, model_path: str, scaler_path: str) -> bool:
-        """Load the trained model and scaler from disk"""
+        """
+        Load the trained model and scaler from disk
+
+        Args:
+            model_path: Path to the model file
+            scaler_path: Path to the scaler file
+        """
         try:
             model_file = Path(model_path)
             scaler_file = Path(scaler_path)
@@ -254,8 +282,18 @@ class EnhancedFraudDetectionModel:
             self.is_loaded = False
             return False
 
-    def save(self, model_path: str, scaler_path: str) -> bool:
-        """Save the model, scaler, and metadata"""
+    def save(self, model_path: str, scaler_path: str, compress: Any = 0) -> bool:
+        """
+        Save the model, scaler, and metadata
+
+        Files are written to a temporary path and renamed into place, so
+        readers never see a partially written artifact.
+
+        Args:
+            model_path: Path to the model file
+            scaler_path: Path to the scaler file
+            compress: joblib compression setting (e.g. ("lz4", 3))
+        """
         try:
             if not self.is_loaded:
                 raise RuntimeError("No model to save")
@@ -267,13 +305,15 @@ class EnhancedFraudDetectionModel:
             model_file.parent.mkdir(parents=True, exist_ok=True)
 
             # Save model and scaler
-            joblib.dump(self.model, model_file)
-            joblib.dump(self.scaler, scaler_file)
+            _atomic_dump(self.model, model_file, compress=compress)
+            _atomic_dump(self.scaler, scaler_file, compress=compress)
 
             # Save model info
             info_path = model_file.parent / "model_info_v2.json"
-            with open(info_path, 'w') as f:
+            tmp_info_path = info_path.with_name(info_path.name + ".tmp")
+            with open(tmp_info_path, 'w') as f:
                 json.dump(self.model_info, f, indent=2)
+            os.replace(tmp_info_path, info_path)
 
             logger.info("Model saved successfully")
             return True
@@ -1,11 +1,31 @@
 """Data preprocessing utilities"""
 
+from operator import attrgetter
 from typing import List
 
 import numpy as np
 
 from ..models.schemas import TransactionInput
 
+# Transaction field names in model feature order (Time, V1-V28, Amount)
+FEATURE_KEYS = ["time"] + [f"v{i}" for i in range(1, 29)] + ["amount"]
+
+# Per-feature uniform bounds used to synthesize fraudulent samples
+_FRAUD_LOW = np.array([
+    0, -3, 2, -5, 3, -2, -2, -5, 0, -3, -15, 3, -10, 0, -15,
+    -2, -8, -12, -3, 0, 0, 0, 0, -1, -1, 0, -1, 0, 0, 100,
+], dtype=np.float64)
+_FRAUD_HIGH = np.array([
+    172792, -1, 5, -2, 6, 0, 0, -2, 2, -1, -8, 5, -5, 2, -10,
+    0, -4, -6, -1, 2, 1, 1, 1, 0, 0, 1, 0, 2, 1, 1500,
+], dtype=np.float64)
+
+_RNG = np.random.default_rng()
+
+# Pulls all feature attributes off a transaction in one call, as a tuple
+_feature_getter = attrgetter(*FEATURE_KEYS)
+_ROW_DTYPE = np.dtype((np.float64, len(FEATURE_KEYS)))
+
 
 class DataProcessor:
     """Process and transform transaction data for ML model"""
@@ -48,10 +68,17 @@ class DataProcessor:
 
     @staticmethod
     def transactions_to_batch(transactions: List[TransactionInput]) -> np.ndarray:
-        """Convert list of transactions to numpy array for batch prediction"""
-        return np.array([
-            DataProcessor.transaction_to_array(t) for t in transactions
-        ])
+        """
+        Convert list of transactions to numpy array for batch prediction
+
+        Rows are streamed straight into one preallocated (N, 30) array
+        instead of building an intermediate array per transaction.
+        """
+        return np.fromiter(
+            map(_feature_getter, transactions),
+            dtype=_ROW_DTYPE,
+            count=len(transactions),
+        )
 
     @staticmethod
     def generate_sample_transaction(is_fraud: bool = False) -> dict:
@@ -59,69 +86,12 @@ class DataProcessor:
         if is_fraud:
             # Fraud transactions: based on actual model feature importances
             # Top features: V14 (0.19), V10 (0.11), V4 (0.11), V12 (0.10), V17 (0.08)
-            return {
-                "time": float(np.random.uniform(0, 172792)),
-                "v1": float(np.random.uniform(-3, -1)),
-                "v2": float(np.random.uniform(2, 5)),
-                "v3": float(np.random.uniform(-5, -2)),
-                "v4": float(np.random.uniform(3, 6)),
-                "v5": float(np.random.uniform(-2, 0)),
-                "v6": float(np.random.uniform(-2, 0)),
-                "v7": float(np.random.uniform(-5, -2)),
-                "v8": float(np.random.uniform(0, 2)),
-                "v9": float(np.random.uniform(-3, -1)),
-                "v10": float(np.random.uniform(-15, -8)),
-                "v11": float(np.random.uniform(3, 5)),
-                "v12": float(np.random.uniform(-10, -5)),
-                "v13": float(np.random.uniform(0, 2)),
-                "v14": float(np.random.uniform(-15, -10)),
-                "v15": float(np.random.uniform(-2, 0)),
-                "v16": float(np.random.uniform(-8, -4)),
-                "v17": float(np.random.uniform(-12, -6)),
-                "v18": float(np.random.uniform(-3, -1)),
-                "v19": float(np.random.uniform(0, 2)),
-                "v20": float(np.random.uniform(0, 1)),
-                "v21": float(np.random.uniform(0, 1)),
-                "v22": float(np.random.uniform(0, 1)),
-                "v23": float(np.random.uniform(-1, 0)),
-                "v24": float(np.random.uniform(-1, 0)),
-                "v25": float(np.random.uniform(0, 1)),
-                "v26": float(np.random.uniform(-1, 0)),
-                "v27": float(np.random.uniform(0, 2)),
-                "v28": float(np.random.uniform(0, 1)),
-                "amount": float(np.random.uniform(100, 1500)),
-            }
+            values = _RNG.uniform(_FRAUD_LOW, _FRAUD_HIGH)
         else:
             # Normal transaction patterns
-            return {
-                "time": float(np.random.uniform(0, 172792)),
-                "v1": float(np.random.normal(0, 1)),
-                "v2": float(np.random.normal(0, 1)),
-                "v3": float(np.random.normal(0, 1)),
-                "v4": float(np.random.normal(0, 1)),
-                "v5": float(np.random.normal(0, 1)),
-                "v6": float(np.random.normal(0, 1)),
-                "v7": float(np.random.normal(0, 1)),
-                "v8": float(np.random.normal(0, 1)),
-                "v9": float(np.random.normal(0, 1)),
-                "v10": float(np.random.normal(0, 1)),
-                "v11": float(np.random.normal(0, 1)),
-                "v12": float(np.random.normal(0, 1)),
-                "v13": float(np.random.normal(0, 1)),
-                "v14": float(np.random.normal(0, 1)),
-                "v15": float(np.random.normal(0, 1)),
-                "v16": float(np.random.normal(0, 1)),
-                "v17": float(np.random.normal(0, 1)),
-                "v18": float(np.random.normal(0, 1)),
-                "v19": float(np.random.normal(0, 1)),
-                "v20": float(np.random.normal(0, 1)),
-                "v21": float(np.random.normal(0, 1)),
-                "v22": float(np.random.normal(0, 1)),
-                "v23": float(np.random.normal(0, 1)),
-                "v24": float(np.random.normal(0, 1)),
-                "v25": float(np.random.normal(0, 1)),
-                "v26": float(np.random.normal(0, 1)),
-                "v27": float(np.random.normal(0, 1)),
-                "v28": float(np.random.normal(0, 1)),
-                "amount": float(np.random.uniform(10, 200)),
-            }
+            values = np.empty(len(FEATURE_KEYS))
+            values[0] = _RNG.uniform(0, 172792)
+            values[1:-1] = _RNG.normal(0, 1, len(FEATURE_KEYS) - 2)
+            values[-1] = _RNG.uniform(10, 200)
+
+        return dict(zip(FEATURE_KEYS, values.tolist()))
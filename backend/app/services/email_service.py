@@ -42,8 +42,9 @@ class EmailService:
         body_text: Optional[str] = None
     ) -> bool:
         """Send an email"""
-        if not settings.smtp_user:
-            logger.warning("SMTP not configured, skipping email")
+        server = EmailService._create_smtp_connection()
+        if server is None:
+            logger.warning("SMTP not configured or unreachable, skipping email")
             return False
 
         try:
@@ -59,18 +60,22 @@ class EmailService:
             # Add HTML version
             msg.attach(MIMEText(body_html, "html"))
 
-            server = EmailService._create_smtp_connection()
-            if server:
-                server.sendmail(settings.email_from, to_email, msg.as_string())
-                server.quit()
-                logger.info(f"Email sent to {to_email}")
-                return True
-            return False
+            server.send_message(
+                msg, from_addr=settings.email_from, to_addrs=[to_email]
+            )
+            logger.info(f"Email sent to {to_email}")
+            return True
 
         except Exception as e:
             logger.error(f"Failed to send email: {e}")
             return False
 
+        finally:
+            try:
+                server.quit()
+            except Exception:
+                pass
+
     @staticmethod
     def send_password_reset_email(to_email: str, reset_token: str, username: str) -> bool:
         """Send password reset email"""
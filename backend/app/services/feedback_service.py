@@ -1,18 +1,28 @@
 """Service for collecting feedback and retraining ML models"""
 
+import json
 import logging
+import uuid
 from datetime import datetime
 from typing import List, Dict, Optional, Any
 import numpy as np
+from sklearn.model_selection import StratifiedShuffleSplit
 from sqlalchemy.orm import Session
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, update
 from sqlalchemy.ext.declarative import declarative_base
 
 from app.db.database import Base
-from app.models.enhanced_ml_model import EnhancedFraudDetectionModel, ModelType
+from app.models.enhanced_ml_model import (
+    ARTIFACT_COMPRESS,
+    EnhancedFraudDetectionModel,
+    ModelType,
+)
 
 logger = logging.getLogger(__name__)
 
+# Number of base features per transaction (Time, V1-V28, Amount)
+N_FEATURES = 30
+
 
 class PredictionFeedback(Base):
     """Store feedback on predictions for model retraining"""
@@ -109,8 +119,6 @@ class FeedbackService:
         Returns:
             Created PredictionFeedback object
         """
-        import json
-
         # Determine feedback type
         if predicted_fraud == actual_fraud:
             feedback_type = "correct"
@@ -178,36 +186,118 @@ class FeedbackService:
             include_used: Whether to include previously used samples
 
         Returns:
-            Tuple of (X, y) or None if insufficient data
+            Tuple of (X, y) or None if insufficient data. X is a float32
+            array of shape (n_samples, 30) and y an int8 label array; keep
+            these dtypes when swapping models so the fit is not upcast.
         """
-        import json
-
-        query = db.query(PredictionFeedback)
+        query = db.query(
+            PredictionFeedback.id,
+            PredictionFeedback.features_json,
+            PredictionFeedback.actual_fraud
+        )
         if not include_used:
             query = query.filter(PredictionFeedback.used_in_training == False)
 
-        feedbacks = query.all()
+        rows = query.all()
 
-        if len(feedbacks) < min_samples:
+        if len(rows) < min_samples:
             logger.warning(
-                f"Insufficient feedback samples: {len(feedbacks)} < {min_samples}"
+                f"Insufficient feedback samples: {len(rows)} < {min_samples}"
             )
             return None
 
-        # Extract features and labels
-        X = []
+        return self._rows_to_arrays(rows)
+
+    def claim_training_data(
+        self,
+        db: Session,
+        batch_id: str,
+        min_samples: int = 100
+    ) -> Optional[tuple]:
+        """
+        Mark unused feedback as used by a training batch and return its data
+
+        The rows are flagged and fetched with a single UPDATE ... RETURNING
+        statement that is committed straight away, so no transaction (and no
+        row locks) stays open while the model trains. If training fails the
+        caller hands the rows back with release_training_data.
+
+        Args:
+            db: Database session
+            batch_id: Training batch ID to stamp on the claimed rows
+            min_samples: Minimum samples required
+
+        Returns:
+            Tuple of (X, y) or None if insufficient data. X is a float32
+            array of shape (n_samples, 30) and y an int8 label array; keep
+            these dtypes when swapping models so the fit is not upcast.
+        """
+        stmt = (
+            update(PredictionFeedback)
+            .where(PredictionFeedback.used_in_training == False)
+            .values(used_in_training=True, training_batch_id=batch_id)
+            .returning(
+                PredictionFeedback.id,
+                PredictionFeedback.features_json,
+                PredictionFeedback.actual_fraud
+            )
+            .execution_options(synchronize_session=False)
+        )
+        rows = db.execute(stmt).all()
+
+        if len(rows) < min_samples:
+            db.rollback()
+            logger.warning(
+                f"Insufficient feedback samples: {len(rows)} < {min_samples}"
+            )
+            return None
+
+        db.commit()
+        return self._rows_to_arrays(rows)
+
+    def release_training_data(self, db: Session, batch_id: str) -> int:
+        """
+        Return feedback claimed by a failed training batch to the pool
+
+        Args:
+            db: Database session
+            batch_id: Training batch ID stamped by claim_training_data
+
+        Returns:
+            Number of feedback rows released
+        """
+        result = db.execute(
+            update(PredictionFeedback)
+            .where(PredictionFeedback.training_batch_id == batch_id)
+            .values(used_in_training=False, training_batch_id=None)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return result.rowcount
+
+    @staticmethod
+    def _rows_to_arrays(rows) -> tuple:
+        """Convert (id, features_json, actual_fraud) rows into (X, y) arrays"""
+        # Extract features into a flat buffer and labels
+        buf = []
         y = []
 
-        for feedback in feedbacks:
+        for feedback_id, features_json, actual_fraud in rows:
             try:
-                features = json.loads(feedback.features_json)
-                X.append(features)
-                y.append(int(feedback.actual_fraud))
+                features = json.loads(features_json)
+                if len(features) != N_FEATURES:
+                    raise ValueError(
+                        f"expected {N_FEATURES} features, got {len(features)}"
+                    )
+                label = int(actual_fraud)
             except Exception as e:
-                logger.error(f"Error parsing feedback {feedback.id}: {e}")
+                logger.error(f"Error parsing feedback {feedback_id}: {e}")
                 continue
+            buf.extend(features)
+            y.append(label)
 
-        return np.array(X), np.array(y)
+        X = np.asarray(buf, dtype=np.float32).reshape(-1, N_FEATURES)
+        return X, np.asarray(y, dtype=np.int8)
 
     def retrain_model(
         self,
@@ -228,9 +318,6 @@ class FeedbackService:
         Returns:
             ModelTrainingJob object or None if failed
         """
-        import uuid
-        from sklearn.model_selection import train_test_split
-
         batch_id = f"train_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{str(uuid.uuid4())[:8]}"
 
         # Create training job
@@ -250,8 +337,8 @@ class FeedbackService:
             job.status = "running"
             db.commit()
 
-            # Get training data
-            data = self.get_training_data(db, min_samples=min_samples)
+            # Claim training data (marks feedback as used, released on failure)
+            data = self.claim_training_data(db, batch_id, min_samples=min_samples)
             if data is None:
                 raise ValueError(f"Insufficient training samples (need {min_samples})")
 
@@ -261,12 +348,15 @@ class FeedbackService:
             job.total_samples = len(y)
             job.fraud_samples = int(np.sum(y))
             job.legitimate_samples = int(len(y) - np.sum(y))
-            db.commit()
 
-            # Split data
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=test_split, stratify=y, random_state=42
+            # Split data by stratified indices rather than copying X twice
+            splitter = StratifiedShuffleSplit(
+                n_splits=1, test_size=test_split, random_state=42
             )
+            train_idx, test_idx = next(splitter.split(X, y))
+            X_train, y_train = X[train_idx], y[train_idx]
+            X_test, y_test = X[test_idx], y[test_idx]
+            del X, y
 
             # Train model
             model = EnhancedFraudDetectionModel(model_type=model_type)
@@ -275,7 +365,7 @@ class FeedbackService:
             # Save model
             model_path = f"models/enhanced_model_{batch_id}.pkl"
             scaler_path = f"models/enhanced_scaler_{batch_id}.pkl"
-            model.save(model_path, scaler_path)
+            model.save(model_path, scaler_path, compress=ARTIFACT_COMPRESS)
 
             # Update job with metrics
             job.accuracy = metrics.get("accuracy")
@@ -285,14 +375,6 @@ class FeedbackService:
             job.status = "completed"
             job.completed_at = datetime.utcnow()
 
-            # Mark feedback as used
-            db.query(PredictionFeedback).filter(
-                PredictionFeedback.used_in_training == False
-            ).update({
-                "used_in_training": True,
-                "training_batch_id": batch_id
-            })
-
             db.commit()
             db.refresh(job)
 
@@ -303,6 +385,9 @@ class FeedbackService:
 
         except Exception as e:
             logger.error(f"Model retraining failed: {e}")
+            db.rollback()
+            # Release the claimed feedback rows
+            self.release_training_data(db, batch_id)
             job.status = "failed"
             job.error_message = str(e)
             job.completed_at = datetime.utcnow()
@@ -1,11 +1,18 @@
 """Fraud detection service - Main business logic"""
 
+import asyncio
+import hashlib
+import logging
+import os
+import threading
 import time
-from datetime import datetime
-from typing import Dict, List
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 
+from ..core.config import settings
 from ..models.ml_model import fraud_model, FraudDetectionModel
 from ..models.schemas import (
     TransactionInput,
@@ -15,41 +22,320 @@ from ..models.schemas import (
     ModelInfo,
     StatsResponse,
 )
+from .cache_service import cache
 from .data_processor import DataProcessor
 
+logger = logging.getLogger(__name__)
+
+# Model inference runs here so the event loop keeps accepting requests
+PREDICT_POOL = ThreadPoolExecutor(
+    max_workers=os.cpu_count() or 1, thread_name_prefix="predict"
+)
+
+
+class PredictionCache:
+    """
+    Content-addressed cache of (is_fraud, probability) by feature vector
+
+    Keeps a bounded in-process LRU with a TTL and mirrors entries to Redis
+    through the shared cache service when Redis caching is enabled.
+    """
+
+    def __init__(self, enabled: bool = True, max_size: int = 10000, ttl_seconds: int = 60):
+        self.enabled = enabled
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, bool, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key_for(self, features: np.ndarray) -> Optional[str]:
+        """Build the cache key for a feature vector (None when disabled)"""
+        if not self.enabled:
+            return None
+
+        digest = hashlib.blake2b(
+            np.ascontiguousarray(features, dtype=np.float64).tobytes(),
+            digest_size=16
+        ).hexdigest()
+        version = fraud_model.model_info.get("version", "1.0.0")
+        return f"prediction:features:{version}:{digest}"
+
+    def get(self, key: Optional[str]) -> Optional[Tuple[bool, float]]:
+        """Return a cached prediction, checking the local LRU then Redis"""
+        if key is None:
+            return None
+
+        local = self._get_local(key)
+        if local is not None:
+            return local
+        return self._get_remote(key)
+
+    async def get_async(self, key: Optional[str]) -> Optional[Tuple[bool, float]]:
+        """
+        get() for the event loop
+
+        Only the in-process LRU is read on the loop; the blocking Redis
+        lookup on a local miss runs in the default executor.
+        """
+        if key is None:
+            return None
+
+        local = self._get_local(key)
+        if local is not None or not cache.enabled:
+            return local
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self._get_remote, key
+        )
+
+    def set(self, key: Optional[str], is_fraud: bool, fraud_prob: float) -> None:
+        """Cache a prediction locally and in Redis"""
+        if key is None:
+            return
+
+        self._store(key, is_fraud, fraud_prob, time.monotonic())
+        cache.set(key, [is_fraud, fraud_prob], self.ttl_seconds)
+
+    def set_async(self, key: Optional[str], is_fraud: bool, fraud_prob: float) -> None:
+        """
+        set() for the event loop
+
+        Stores in the local LRU immediately and writes back to Redis
+        fire-and-forget in the default executor (cache.set logs its own
+        errors), so the caller never waits on Redis.
+        """
+        if key is None:
+            return
+
+        self._store(key, is_fraud, fraud_prob, time.monotonic())
+        if cache.enabled:
+            asyncio.get_running_loop().run_in_executor(
+                None, cache.set, key, [is_fraud, fraud_prob], self.ttl_seconds
+            )
+
+    def _get_local(self, key: str) -> Optional[Tuple[bool, float]]:
+        """Look a key up in the local LRU, dropping it if expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, is_fraud, fraud_prob = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                return is_fraud, fraud_prob
+            del self._entries[key]
+        return None
+
+    def _get_remote(self, key: str) -> Optional[Tuple[bool, float]]:
+        """Look a key up in Redis and promote a hit into the local LRU"""
+        cached = cache.get(key)
+        if cached is None:
+            return None
+
+        is_fraud, fraud_prob = bool(cached[0]), float(cached[1])
+        self._store(key, is_fraud, fraud_prob, time.monotonic())
+        return is_fraud, fraud_prob
+
+    def _store(self, key: str, is_fraud: bool, fraud_prob: float, now: float) -> None:
+        """Insert into the local LRU, evicting the oldest entries past max_size"""
+        with self._lock:
+            self._entries[key] = (now + self.ttl_seconds, is_fraud, fraud_prob)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all locally cached predictions"""
+        with self._lock:
+            self._entries.clear()
+
+
+# Global prediction cache instance
+prediction_cache = PredictionCache(
+    enabled=settings.prediction_cache_enabled,
+    max_size=settings.prediction_cache_max_size,
+    ttl_seconds=settings.prediction_cache_ttl_seconds,
+)
+
+
+class PredictionBatcher:
+    """
+    Coalesce concurrent single predictions into one batched model call
+
+    Requests are queued with a future; a background task drains up to
+    max_batch_size rows (waiting at most batch_timeout_ms for stragglers),
+    runs one predict_batch_arrays call on PREDICT_POOL and resolves each
+    caller's future.
+    """
+
+    def __init__(self, max_batch_size: int = 128, batch_timeout_ms: float = 10.0):
+        self.max_batch_size = max_batch_size
+        self.batch_timeout = batch_timeout_ms / 1000
+        self.running = False
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: set = set()
+
+    async def submit(self, features: np.ndarray) -> Tuple[bool, float]:
+        """Queue one feature row and wait for its (is_fraud, probability)"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((features, future))
+        return await future
+
+    async def _batch_loop(self):
+        """Collect queued rows into batches and dispatch them"""
+        loop = asyncio.get_running_loop()
+
+        while self.running:
+            items = [await self._queue.get()]
+            deadline = loop.time() + self.batch_timeout
+
+            while len(items) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(
+                        await asyncio.wait_for(self._queue.get(), remaining)
+                    )
+                except asyncio.TimeoutError:
+                    break
+
+            # Keep collecting the next batch while this one is predicted
+            task = asyncio.create_task(self._dispatch(items))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    @staticmethod
+    async def _dispatch(items: List[Tuple[np.ndarray, asyncio.Future]]) -> None:
+        """Run one batched prediction and resolve the waiting futures"""
+        batch = np.stack([features for features, _ in items])
+        try:
+            flags, probs = await asyncio.get_running_loop().run_in_executor(
+                PREDICT_POOL, fraud_model.predict_batch_arrays, batch
+            )
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), is_fraud, prob in zip(items, flags.tolist(), probs.tolist()):
+            if not future.done():
+                future.set_result((is_fraud, prob))
+
+    async def start(self):
+        """Start the background batching task"""
+        if self.running:
+            return
+
+        self.running = True
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._batch_loop())
+        logger.info(
+            f"Prediction batcher started (max {self.max_batch_size} rows, "
+            f"{self.batch_timeout * 1000:.0f} ms window)"
+        )
+
+    async def stop(self):
+        """Stop the batching task and fail any requests still queued"""
+        self.running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+        while self._queue is not None and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Prediction batcher stopped"))
+
+
+# Global batcher instance, started from the application lifespan
+prediction_batcher = PredictionBatcher(
+    max_batch_size=settings.prediction_batch_max_size,
+    batch_timeout_ms=settings.prediction_batch_timeout_ms,
+)
+
 
 class FraudDetectorService:
     """Service for fraud detection operations"""
 
     # Track statistics
-    _stats = {
-        "total_predictions": 0,
-        "fraud_detected": 0,
-        "legitimate_detected": 0,
-        "total_response_time_ms": 0.0,
-        "start_time": datetime.now(),
-    }
+    _total: int = 0
+    _fraud: int = 0
+    _legit: int = 0
+    _rt_ms_sum: float = 0.0
+    _start_ns: int = time.monotonic_ns()
+    _stats_lock = threading.Lock()
 
     @classmethod
     def predict_single(cls, transaction: TransactionInput) -> PredictionResponse:
         """Make a fraud prediction for a single transaction"""
-        start_time = time.perf_counter()
+        start_ns = time.monotonic_ns()
 
         # Convert transaction to numpy array
         features = DataProcessor.transaction_to_array(transaction)
 
-        # Make prediction
-        is_fraud, fraud_prob = fraud_model.predict(features)
+        # Make prediction (identical feature vectors are served from cache)
+        cache_key = prediction_cache.key_for(features)
+        cached = prediction_cache.get(cache_key)
+        if cached is not None:
+            is_fraud, fraud_prob = cached
+        else:
+            is_fraud, fraud_prob = fraud_model.predict(features)
+            prediction_cache.set(cache_key, is_fraud, fraud_prob)
+
+        return cls._build_response(is_fraud, fraud_prob, start_ns)
+
+    @classmethod
+    async def predict_single_async(
+        cls, transaction: TransactionInput
+    ) -> PredictionResponse:
+        """
+        Make a fraud prediction for a single transaction from a request handler
+
+        Goes through the micro-batcher when it is running so concurrent
+        requests share one model call; otherwise predicts on PREDICT_POOL.
+        """
+        if not prediction_batcher.running:
+            return await asyncio.get_running_loop().run_in_executor(
+                PREDICT_POOL, cls.predict_single, transaction
+            )
+
+        start_ns = time.monotonic_ns()
+        features = DataProcessor.transaction_to_array(transaction)
+
+        cache_key = prediction_cache.key_for(features)
+        cached = await prediction_cache.get_async(cache_key)
+        if cached is not None:
+            is_fraud, fraud_prob = cached
+        else:
+            is_fraud, fraud_prob = await prediction_batcher.submit(features)
+            prediction_cache.set_async(cache_key, is_fraud, fraud_prob)
 
+        return cls._build_response(is_fraud, fraud_prob, start_ns)
+
+    @classmethod
+    def _build_response(
+        cls, is_fraud: bool, fraud_prob: float, start_ns: int
+    ) -> PredictionResponse:
+        """Build a single prediction response and record its stats"""
         # Calculate metrics
-        prediction_time_ms = (time.perf_counter() - start_time) * 1000
+        prediction_time_ms = (time.monotonic_ns() - start_ns) / 1e6
         confidence = FraudDetectionModel.get_confidence_level(
             fraud_prob if is_fraud else (1 - fraud_prob)
         )
         risk_score = FraudDetectionModel.get_risk_score(fraud_prob)
 
         # Update stats
-        cls._update_stats(is_fraud, prediction_time_ms)
+        cls._update_stats(1, int(is_fraud), prediction_time_ms)
 
         return PredictionResponse(
             is_fraud=is_fraud,
@@ -64,36 +350,34 @@ class FraudDetectorService:
         cls, transactions: List[TransactionInput]
     ) -> BatchPredictionResponse:
         """Make fraud predictions for multiple transactions"""
-        start_time = time.perf_counter()
+        start_ns = time.monotonic_ns()
 
         # Convert to batch array
         features_batch = DataProcessor.transactions_to_batch(transactions)
 
         # Make predictions
-        predictions = fraud_model.predict_batch(features_batch)
-
-        # Process results
-        results = []
-        fraud_count = 0
-
-        for idx, (is_fraud, fraud_prob) in enumerate(predictions):
-            if is_fraud:
-                fraud_count += 1
-
-            results.append(
-                SingleBatchResult(
-                    index=idx,
-                    is_fraud=is_fraud,
-                    fraud_probability=round(fraud_prob, 4),
-                    risk_score=FraudDetectionModel.get_risk_score(fraud_prob),
-                )
+        flags, probs = fraud_model.predict_batch_arrays(features_batch)
+
+        # Values come straight from NumPy, so skip per-row Pydantic validation
+        rounded_probs = np.round(probs, 4).tolist()
+        risk_scores = FraudDetectionModel.get_risk_scores(probs).tolist()
+        results = [
+            SingleBatchResult.model_construct(
+                index=idx,
+                is_fraud=is_fraud,
+                fraud_probability=prob,
+                risk_score=score,
+            )
+            for idx, (is_fraud, prob, score) in enumerate(
+                zip(flags.tolist(), rounded_probs, risk_scores)
             )
+        ]
+        fraud_count = int(flags.sum())
 
-        processing_time_ms = (time.perf_counter() - start_time) * 1000
+        processing_time_ms = (time.monotonic_ns() - start_ns) / 1e6
 
         # Update stats
-        for is_fraud, _ in predictions:
-            cls._update_stats(is_fraud, processing_time_ms / len(predictions))
+        cls._update_stats(len(results), fraud_count, processing_time_ms)
 
         legitimate_count = len(transactions) - fraud_count
         fraud_rate = fraud_count / len(transactions) if transactions else 0
@@ -107,6 +391,15 @@ class FraudDetectorService:
             processing_time_ms=round(processing_time_ms, 2),
         )
 
+    @classmethod
+    async def predict_batch_async(
+        cls, transactions: List[TransactionInput]
+    ) -> BatchPredictionResponse:
+        """Make fraud predictions for multiple transactions on PREDICT_POOL"""
+        return await asyncio.get_running_loop().run_in_executor(
+            PREDICT_POOL, cls.predict_batch, transactions
+        )
+
     @classmethod
     def get_model_info(cls) -> ModelInfo:
         """Get information about the loaded model"""
@@ -129,20 +422,16 @@ class FraudDetectorService:
     @classmethod
     def get_stats(cls) -> StatsResponse:
         """Get API usage statistics"""
-        total = cls._stats["total_predictions"]
-        avg_time = (
-            cls._stats["total_response_time_ms"] / total if total > 0 else 0
-        )
-        uptime = (datetime.now() - cls._stats["start_time"]).total_seconds()
+        total = cls._total
+        avg_time = cls._rt_ms_sum / total if total > 0 else 0
+        uptime = (time.monotonic_ns() - cls._start_ns) / 1e9
 
-        fraud_rate = (
-            cls._stats["fraud_detected"] / total if total > 0 else 0
-        )
+        fraud_rate = cls._fraud / total if total > 0 else 0
 
         return StatsResponse(
             total_predictions=total,
-            fraud_detected=cls._stats["fraud_detected"],
-            legitimate_detected=cls._stats["legitimate_detected"],
+            fraud_detected=cls._fraud,
+            legitimate_detected=cls._legit,
             fraud_rate=round(fraud_rate, 4),
             average_response_time_ms=round(avg_time, 2),
             uptime_seconds=round(uptime, 2),
@@ -154,23 +443,22 @@ class FraudDetectorService:
         return fraud_model.get_feature_importance()
 
     @classmethod
-    def _update_stats(cls, is_fraud: bool, response_time_ms: float) -> None:
-        """Update internal statistics"""
-        cls._stats["total_predictions"] += 1
-        cls._stats["total_response_time_ms"] += response_time_ms
-
-        if is_fraud:
-            cls._stats["fraud_detected"] += 1
-        else:
-            cls._stats["legitimate_detected"] += 1
+    def _update_stats(
+        cls, count: int, fraud_count: int, response_time_ms: float
+    ) -> None:
+        """Update internal statistics for a group of predictions"""
+        with cls._stats_lock:
+            cls._total += count
+            cls._fraud += fraud_count
+            cls._legit += count - fraud_count
+            cls._rt_ms_sum += response_time_ms
 
     @classmethod
     def reset_stats(cls) -> None:
         """Reset statistics (for testing)"""
-        cls._stats = {
-            "total_predictions": 0,
-            "fraud_detected": 0,
-            "legitimate_detected": 0,
-            "total_response_time_ms": 0.0,
-            "start_time": datetime.now(),
-        }
+        with cls._stats_lock:
+            cls._total = 0
+            cls._fraud = 0
+            cls._legit = 0
+            cls._rt_ms_sum = 0.0
+            cls._start_ns = time.monotonic_ns()
@@ -1,13 +1,16 @@
 """Advanced monitoring and logging service with metrics"""
 
+import asyncio
 import logging
+import threading
 import time
+import numpy as np
 import psutil
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from collections import defaultdict, deque
 from sqlalchemy.orm import Session
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean, Index, case, desc, func
 
 from app.db.database import Base
 
@@ -30,6 +33,10 @@ class SystemMetric(Base):
 
     timestamp = Column(DateTime, default=datetime.utcnow, index=True)
 
+    __table_args__ = (
+        Index("ix_system_metrics_type_name_timestamp", "metric_type", "metric_name", "timestamp"),
+    )
+
 
 class APIRequestLog(Base):
     """Detailed API request logging"""
@@ -58,6 +65,51 @@ class APIRequestLog(Base):
     # Timestamps
     timestamp = Column(DateTime, default=datetime.utcnow, index=True)
 
+    __table_args__ = (
+        Index("ix_api_request_logs_timestamp_status", "timestamp", "status_code"),
+        Index("ix_api_request_logs_path_timestamp", "path", "timestamp"),
+    )
+
+
+class MetricRingBuffer:
+    """
+    Fixed-size ring buffer of (value, timestamp) samples for one metric
+
+    Values and epoch-millisecond timestamps are kept in two preallocated
+    arrays, so appending a sample never allocates.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self.values = np.empty(capacity, dtype=np.float64)
+        self.timestamps = np.empty(capacity, dtype=np.int64)
+        self.idx = 0
+        self.n = 0
+
+    def append(self, value: float, timestamp_ms: int):
+        """Write a sample, overwriting the oldest once the buffer is full"""
+        i = self.idx % self.capacity
+        self.values[i] = value
+        self.timestamps[i] = timestamp_ms
+        self.idx += 1
+        if self.n < self.capacity:
+            self.n += 1
+
+    def __len__(self) -> int:
+        return self.n
+
+    def ordered(self) -> tuple:
+        """Get (values, timestamps) oldest first"""
+        if self.n < self.capacity:
+            return self.values[:self.n], self.timestamps[:self.n]
+        start = self.idx % self.capacity
+        order = np.r_[start:self.capacity, 0:start]
+        return self.values[order], self.timestamps[order]
+
+    def mean(self) -> float:
+        """Mean of the buffered values (0.0 when empty)"""
+        return float(self.values[:self.n].mean()) if self.n else 0.0
+
 
 class MonitoringService:
     """
@@ -73,7 +125,21 @@ class MonitoringService:
 
     def __init__(self):
         # In-memory metrics cache
-        self.metrics_cache = defaultdict(lambda: deque(maxlen=1000))
+        self.metrics_cache: Dict[str, MetricRingBuffer] = defaultdict(MetricRingBuffer)
+
+        # Pending rows, written with one bulk insert per flush
+        self._log_buffer = deque(maxlen=10_000)
+        self._metric_buffer = deque(maxlen=10_000)
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self.flush_batch_size = 500
+        self.flush_interval_seconds = 1.0
+        self.running = False
+        self._task: Optional[asyncio.Task] = None
+
+        # Prime psutil so later non-blocking cpu_percent() calls measure
+        # usage since the previous call instead of sleeping
+        psutil.cpu_percent(interval=None)
 
         # Performance tracking
         self.request_times = deque(maxlen=1000)
@@ -93,7 +159,7 @@ class MonitoringService:
         """Collect and store system metrics"""
         try:
             # CPU metrics
-            cpu_percent = psutil.cpu_percent(interval=1)
+            cpu_percent = psutil.cpu_percent(interval=None)
             self._store_metric(db, "system", "cpu_usage", cpu_percent, "%")
 
             # Memory metrics
@@ -114,6 +180,8 @@ class MonitoringService:
             except:
                 pass
 
+            self._maybe_flush(db)
+
             # Check for alerts
             self._check_system_alerts(cpu_percent, memory.percent, disk.percent)
 
@@ -130,27 +198,20 @@ class MonitoringService:
         value: float,
         unit: Optional[str] = None
     ):
-        """Store a metric in database"""
-        try:
-            metric = SystemMetric(
-                metric_type=metric_type,
-                metric_name=metric_name,
-                value=value,
-                unit=unit
-            )
-
-            db.add(metric)
-            db.commit()
-
-            # Also cache in memory
-            self.metrics_cache[f"{metric_type}.{metric_name}"].append({
-                'value': value,
-                'timestamp': datetime.utcnow()
-            })
-
-        except Exception as e:
-            logger.error(f"Failed to store metric: {e}")
-            db.rollback()
+        """Buffer a metric for the next database flush"""
+        now = datetime.utcnow()
+        self._metric_buffer.append({
+            'metric_type': metric_type,
+            'metric_name': metric_name,
+            'value': value,
+            'unit': unit,
+            'timestamp': now
+        })
+
+        # Also cache in memory
+        self.metrics_cache[f"{metric_type}.{metric_name}"].append(
+            value, int(time.time() * 1000)
+        )
 
     def _check_system_alerts(self, cpu: float, memory: float, disk: float):
         """Check if system metrics exceed thresholds"""
@@ -174,45 +235,116 @@ class MonitoringService:
         user_id: Optional[int] = None,
         error_message: Optional[str] = None
     ):
-        """Log an API request"""
+        """Log an API request (buffered, written in batches)"""
+        self._log_buffer.append({
+            'method': method,
+            'path': path,
+            'status_code': status_code,
+            'response_time_ms': response_time_ms,
+            'client_ip': client_ip,
+            'user_id': user_id,
+            'error_message': error_message,
+            'timestamp': datetime.utcnow()
+        })
+
+        # Update in-memory stats
+        self.request_times.append(response_time_ms)
+        self.request_count += 1
+
+        if status_code >= 400:
+            self.error_count += 1
+
+        # Check performance alerts
+        if response_time_ms > self.thresholds['api_latency_ms']:
+            logger.warning(f"SLOW API REQUEST: {path} took {response_time_ms}ms")
+
+        self._maybe_flush(db)
+
+    def _maybe_flush(self, db: Session):
+        """Flush buffered rows once the batch size or interval is reached"""
+        pending = len(self._log_buffer) + len(self._metric_buffer)
+        elapsed = time.monotonic() - self._last_flush
+        if pending >= self.flush_batch_size or (
+            pending and elapsed >= self.flush_interval_seconds
+        ):
+            self.flush(db)
+
+    def flush(self, db: Session) -> int:
+        """Write all buffered request logs and metrics in one transaction"""
+        with self._flush_lock:
+            logs = [self._log_buffer.popleft() for _ in range(len(self._log_buffer))]
+            metrics = [self._metric_buffer.popleft() for _ in range(len(self._metric_buffer))]
+            self._last_flush = time.monotonic()
+
+        if not logs and not metrics:
+            return 0
+
         try:
-            log = APIRequestLog(
-                method=method,
-                path=path,
-                status_code=status_code,
-                response_time_ms=response_time_ms,
-                client_ip=client_ip,
-                user_id=user_id,
-                error_message=error_message
-            )
-
-            db.add(log)
+            if logs:
+                db.bulk_insert_mappings(APIRequestLog, logs)
+            if metrics:
+                db.bulk_insert_mappings(SystemMetric, metrics)
             db.commit()
+            return len(logs) + len(metrics)
 
-            # Update in-memory stats
-            self.request_times.append(response_time_ms)
-            self.request_count += 1
+        except Exception as e:
+            logger.error(f"Failed to flush monitoring data: {e}")
+            db.rollback()
+            return 0
 
-            if status_code >= 400:
-                self.error_count += 1
+    async def _flush_loop(self):
+        """Periodically flush buffered rows in the background"""
+        while self.running:
+            await asyncio.sleep(self.flush_interval_seconds)
+            if self._log_buffer or self._metric_buffer:
+                self._flush_with_new_session()
 
-            # Check performance alerts
-            if response_time_ms > self.thresholds['api_latency_ms']:
-                logger.warning(f"SLOW API REQUEST: {path} took {response_time_ms}ms")
+    def _flush_with_new_session(self):
+        """Flush using a dedicated database session"""
+        from app.db.database import SessionLocal
 
-        except Exception as e:
-            logger.error(f"Failed to log API request: {e}")
-            db.rollback()
+        db = SessionLocal()
+        try:
+            self.flush(db)
+        finally:
+            db.close()
+
+    async def start(self):
+        """Start the background flush task"""
+        if self.running:
+            return
+
+        self.running = True
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Stop the background flush task and write any remaining rows"""
+        self.running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        self._flush_with_new_session()
 
     def get_api_performance_stats(self, db: Session, hours: int = 24) -> Dict[str, Any]:
         """Get API performance statistics"""
+        self.flush(db)
         cutoff = datetime.utcnow() - timedelta(hours=hours)
 
-        logs = db.query(APIRequestLog).filter(
+        total, errors, avg_time, oldest = db.query(
+            func.count(APIRequestLog.id),
+            func.sum(case((APIRequestLog.status_code >= 400, 1), else_=0)),
+            func.avg(APIRequestLog.response_time_ms),
+            func.min(APIRequestLog.timestamp)
+        ).filter(
             APIRequestLog.timestamp >= cutoff
-        ).all()
+        ).one()
 
-        if not logs:
+        if not total:
             return {
                 'total_requests': 0,
                 'avg_response_time': 0,
@@ -220,42 +352,42 @@ class MonitoringService:
                 'requests_per_hour': 0
             }
 
-        total = len(logs)
-        errors = sum(1 for log in logs if log.status_code >= 400)
-        avg_time = sum(log.response_time_ms for log in logs) / total
+        errors = int(errors or 0)
 
         # Calculate requests per hour
-        time_span_hours = (datetime.utcnow() - logs[-1].timestamp).total_seconds() / 3600
+        time_span_hours = (datetime.utcnow() - oldest).total_seconds() / 3600
         requests_per_hour = total / max(time_span_hours, 1)
 
         # Top slow endpoints
-        slow_endpoints = defaultdict(list)
-        for log in logs:
-            if log.response_time_ms > 500:
-                slow_endpoints[log.path].append(log.response_time_ms)
-
-        top_slow = sorted(
-            [(path, sum(times)/len(times)) for path, times in slow_endpoints.items()],
-            key=lambda x: x[1],
-            reverse=True
-        )[:5]
+        avg_slow_ms = func.avg(APIRequestLog.response_time_ms).label('avg_time_ms')
+        top_slow = db.query(
+            APIRequestLog.path,
+            avg_slow_ms
+        ).filter(
+            APIRequestLog.timestamp >= cutoff,
+            APIRequestLog.response_time_ms > 500
+        ).group_by(
+            APIRequestLog.path
+        ).order_by(
+            desc(avg_slow_ms)
+        ).limit(5).all()
 
         return {
             'total_requests': total,
             'error_count': errors,
             'error_rate': errors / total,
-            'avg_response_time_ms': avg_time,
+            'avg_response_time_ms': float(avg_time),
             'requests_per_hour': requests_per_hour,
             'top_slow_endpoints': [
-                {'path': path, 'avg_time_ms': avg_time}
-                for path, avg_time in top_slow
+                {'path': path, 'avg_time_ms': float(path_avg)}
+                for path, path_avg in top_slow
             ]
         }
 
     def get_system_health(self, db: Session) -> Dict[str, Any]:
         """Get overall system health status"""
         try:
-            cpu = psutil.cpu_percent(interval=0.1)
+            cpu = psutil.cpu_percent(interval=None)
             memory = psutil.virtual_memory()
             disk = psutil.disk_usage('/')
 
@@ -316,9 +448,15 @@ class MonitoringService:
         hours: int = 24
     ) -> List[Dict[str, Any]]:
         """Get historical metrics"""
+        self.flush(db)
         cutoff = datetime.utcnow() - timedelta(hours=hours)
 
-        metrics = db.query(SystemMetric).filter(
+        # Plain column tuples; no ORM objects are hydrated
+        rows = db.query(SystemMetric).with_entities(
+            SystemMetric.value,
+            SystemMetric.unit,
+            SystemMetric.timestamp
+        ).filter(
             SystemMetric.metric_type == metric_type,
             SystemMetric.metric_name == metric_name,
             SystemMetric.timestamp >= cutoff
@@ -326,11 +464,11 @@ class MonitoringService:
 
         return [
             {
-                'value': m.value,
-                'unit': m.unit,
-                'timestamp': m.timestamp.isoformat()
+                'value': value,
+                'unit': unit,
+                'timestamp': timestamp.isoformat()
             }
-            for m in metrics
+            for value, unit, timestamp in rows
         ]
 
 
@@ -5,18 +5,59 @@ Author: Zhmuryk Andrii
 Copyright (c) 2024 - All Rights Reserved
 """
 
-import json
 import logging
+import time
 from datetime import datetime
 from typing import Optional, Dict, Any, List
 from enum import Enum
 
 import httpx
 
+from ..core import fastjson
 from ..core.config import settings
+from ..core.http2 import HTTP2_AVAILABLE
 
 logger = logging.getLogger(__name__)
 
+# Shared client so webhook posts reuse pooled keep-alive connections
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_notify_client() -> httpx.AsyncClient:
+    """Get the shared notification HTTP client, creating it on first use"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=10.0,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+        )
+    return _client
+
+
+async def close_notify_client() -> None:
+    """Close the shared notification HTTP client (application shutdown)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+# Slack footer timestamps have minute resolution, so format once per minute
+_footer_cache = (-1, "")
+
+
+def _footer_timestamp() -> str:
+    """Get the Slack footer timestamp string, cached for the current minute"""
+    global _footer_cache
+    minute = int(time.time()) // 60
+    if _footer_cache[0] != minute:
+        _footer_cache = (minute, datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC'))
+    return _footer_cache[1]
+
 
 class NotificationType(str, Enum):
     FRAUD_DETECTED = "fraud_detected"
@@ -26,6 +67,60 @@ class NotificationType(str, Enum):
     SYSTEM_ALERT = "system_alert"
 
 
+# Per-type formatting, built once at import time
+_SLACK_EMOJI: Dict[NotificationType, str] = {
+    NotificationType.FRAUD_DETECTED: ":rotating_light:",
+    NotificationType.HIGH_RISK_ALERT: ":warning:",
+    NotificationType.BATCH_COMPLETE: ":white_check_mark:",
+    NotificationType.DAILY_SUMMARY: ":bar_chart:",
+    NotificationType.SYSTEM_ALERT: ":bell:",
+}
+
+_SLACK_COLOR: Dict[NotificationType, str] = {
+    NotificationType.FRAUD_DETECTED: "#dc2626",
+    NotificationType.HIGH_RISK_ALERT: "#f59e0b",
+    NotificationType.BATCH_COMPLETE: "#10b981",
+    NotificationType.DAILY_SUMMARY: "#3b82f6",
+    NotificationType.SYSTEM_ALERT: "#8b5cf6",
+}
+
+_DISCORD_COLOR: Dict[NotificationType, int] = {
+    NotificationType.FRAUD_DETECTED: 0xdc2626,
+    NotificationType.HIGH_RISK_ALERT: 0xf59e0b,
+    NotificationType.BATCH_COMPLETE: 0x10b981,
+    NotificationType.DAILY_SUMMARY: 0x3b82f6,
+    NotificationType.SYSTEM_ALERT: 0x8b5cf6,
+}
+
+_DISCORD_EMOJI: Dict[NotificationType, str] = {
+    NotificationType.FRAUD_DETECTED: "🚨",
+    NotificationType.HIGH_RISK_ALERT: "⚠️",
+    NotificationType.BATCH_COMPLETE: "✅",
+    NotificationType.DAILY_SUMMARY: "📊",
+    NotificationType.SYSTEM_ALERT: "🔔",
+}
+
+_TITLES: Dict[NotificationType, str] = {
+    t: t.value.replace('_', ' ').title() for t in NotificationType
+}
+
+_SLACK_HEADER: Dict[NotificationType, Dict[str, Any]] = {
+    t: {
+        "type": "header",
+        "text": {
+            "type": "plain_text",
+            "text": f"{_SLACK_EMOJI[t]} {_TITLES[t]}",
+            "emoji": True
+        }
+    }
+    for t in NotificationType
+}
+
+_DISCORD_TITLE: Dict[NotificationType, str] = {
+    t: f"{_DISCORD_EMOJI[t]} {_TITLES[t]}" for t in NotificationType
+}
+
+
 class NotificationService:
     """Service for sending notifications to Slack and Discord"""
 
@@ -52,33 +147,8 @@ class NotificationService:
         """
         try:
             # Build Slack message with blocks for rich formatting
-            blocks = []
-
-            # Header
-            emoji = {
-                NotificationType.FRAUD_DETECTED: ":rotating_light:",
-                NotificationType.HIGH_RISK_ALERT: ":warning:",
-                NotificationType.BATCH_COMPLETE: ":white_check_mark:",
-                NotificationType.DAILY_SUMMARY: ":bar_chart:",
-                NotificationType.SYSTEM_ALERT: ":bell:",
-            }.get(notification_type, ":bell:")
-
-            color = {
-                NotificationType.FRAUD_DETECTED: "#dc2626",
-                NotificationType.HIGH_RISK_ALERT: "#f59e0b",
-                NotificationType.BATCH_COMPLETE: "#10b981",
-                NotificationType.DAILY_SUMMARY: "#3b82f6",
-                NotificationType.SYSTEM_ALERT: "#8b5cf6",
-            }.get(notification_type, "#6b7280")
-
-            blocks.append({
-                "type": "header",
-                "text": {
-                    "type": "plain_text",
-                    "text": f"{emoji} {notification_type.value.replace('_', ' ').title()}",
-                    "emoji": True
-                }
-            })
+            blocks = [_SLACK_HEADER[notification_type]]
+            color = _SLACK_COLOR.get(notification_type, "#6b7280")
 
             blocks.append({
                 "type": "section",
@@ -110,7 +180,7 @@ class NotificationService:
                 "elements": [
                     {
                         "type": "mrkdwn",
-                        "text": f"Fraud Detection System • {datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC')}"
+                        "text": f"Fraud Detection System • {_footer_timestamp()}"
                     }
                 ]
             })
@@ -126,19 +196,25 @@ class NotificationService:
             if channel:
                 payload["channel"] = channel
 
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    webhook_url,
-                    json=payload,
-                    timeout=10.0
-                )
-                response.raise_for_status()
-                return True
+            body = fastjson.dumps_bytes(payload)
 
         except Exception as e:
+            logger.error(f"Failed to build Slack notification: {str(e)}")
+            return False
+
+        try:
+            response = await get_notify_client().post(
+                webhook_url, content=body, headers=_JSON_HEADERS
+            )
+        except (httpx.HTTPError, httpx.InvalidURL) as e:
             logger.error(f"Failed to send Slack notification: {str(e)}")
             return False
 
+        if response.status_code >= 400:
+            logger.error(f"Slack webhook returned HTTP {response.status_code}")
+            return False
+        return True
+
     @staticmethod
     async def send_discord_notification(
         webhook_url: str,
@@ -162,26 +238,10 @@ class NotificationService:
         """
         try:
             # Build Discord embed
-            color = {
-                NotificationType.FRAUD_DETECTED: 0xdc2626,
-                NotificationType.HIGH_RISK_ALERT: 0xf59e0b,
-                NotificationType.BATCH_COMPLETE: 0x10b981,
-                NotificationType.DAILY_SUMMARY: 0x3b82f6,
-                NotificationType.SYSTEM_ALERT: 0x8b5cf6,
-            }.get(notification_type, 0x6b7280)
-
-            emoji = {
-                NotificationType.FRAUD_DETECTED: "🚨",
-                NotificationType.HIGH_RISK_ALERT: "⚠️",
-                NotificationType.BATCH_COMPLETE: "✅",
-                NotificationType.DAILY_SUMMARY: "📊",
-                NotificationType.SYSTEM_ALERT: "🔔",
-            }.get(notification_type, "🔔")
-
             embed = {
-                "title": f"{emoji} {notification_type.value.replace('_', ' ').title()}",
+                "title": _DISCORD_TITLE[notification_type],
                 "description": message,
-                "color": color,
+                "color": _DISCORD_COLOR.get(notification_type, 0x6b7280),
                 "timestamp": datetime.utcnow().isoformat(),
                 "footer": {
                     "text": "Fraud Detection System"
@@ -205,19 +265,25 @@ class NotificationService:
                 "embeds": [embed]
             }
 
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    webhook_url,
-                    json=payload,
-                    timeout=10.0
-                )
-                response.raise_for_status()
-                return True
+            body = fastjson.dumps_bytes(payload)
 
         except Exception as e:
+            logger.error(f"Failed to build Discord notification: {str(e)}")
+            return False
+
+        try:
+            response = await get_notify_client().post(
+                webhook_url, content=body, headers=_JSON_HEADERS
+            )
+        except (httpx.HTTPError, httpx.InvalidURL) as e:
             logger.error(f"Failed to send Discord notification: {str(e)}")
             return False
 
+        if response.status_code >= 400:
+            logger.error(f"Discord webhook returned HTTP {response.status_code}")
+            return False
+        return True
+
     @staticmethod
     async def notify_fraud_detected(
         webhook_url: str,
@@ -1,11 +1,73 @@
 """Payment processing service with Stripe and PayPal"""
 
+import asyncio
+import base64
+import hashlib
+import hmac
 import logging
+import threading
+import time
 from typing import Dict, Any, Optional
 from datetime import datetime
 
+import httpx
+
 logger = logging.getLogger(__name__)
 
+# requests is optional; PayPal calls are disabled without it
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    REQUESTS_AVAILABLE = True
+except ImportError:
+    REQUESTS_AVAILABLE = False
+
+
+def verify_signature(
+    payload: bytes,
+    signature: str,
+    secret: str,
+    tolerance: int = 300
+) -> bool:
+    """
+    Verify a timestamped HMAC-SHA256 webhook signature in constant time.
+
+    Uses the Stripe header scheme ``t=<unix ts>,v1=<hex digest>`` where the
+    digest covers ``"<ts>." + payload``. Use this for any signed callback
+    (PayPal, internal services) instead of comparing signatures with ``==``.
+
+    Args:
+        payload: Raw request body
+        signature: Signature header value
+        secret: Shared signing secret
+        tolerance: Maximum age of the signature in seconds (replay guard)
+
+    Returns:
+        True if a signature matches and the timestamp is within tolerance
+    """
+    try:
+        parts = [item.split("=", 1) for item in signature.split(",")]
+        timestamp = next(int(value) for key, value in parts if key.strip() == "t")
+        candidates = [value for key, value in parts if key.strip() == "v1"]
+    except (ValueError, StopIteration):
+        return False
+
+    if not candidates or abs(time.time() - timestamp) > tolerance:
+        return False
+
+    expected = hmac.new(
+        secret.encode(),
+        f"{timestamp}.".encode() + payload,
+        hashlib.sha256
+    ).hexdigest().encode()
+
+    # Check every candidate so timing does not reveal which one matched
+    matched = False
+    for candidate in candidates:
+        matched |= hmac.compare_digest(expected, candidate.strip().encode())
+    return matched
+
 
 class StripePaymentService:
     """
@@ -21,13 +83,28 @@ class StripePaymentService:
     def __init__(self, api_key: Optional[str] = None):
         self.api_key = api_key
         self.client = None
+        self._http_client = None
         self._initialize_client()
 
     def _initialize_client(self):
         """Initialize Stripe client"""
         try:
             import stripe
+            try:
+                from stripe import RequestsClient
+            except ImportError:
+                from stripe.http_client import RequestsClient
+
             stripe.api_key = self.api_key or "sk_test_..."  # Use env variable
+
+            # One shared keep-alive client instead of a new session per request
+            session = None
+            if REQUESTS_AVAILABLE:
+                session = requests.Session()
+                session.mount("https://", HTTPAdapter(pool_maxsize=32))
+            self._http_client = RequestsClient(verify_ssl_certs=True, session=session)
+            stripe.default_http_client = self._http_client
+
             self.client = stripe
             logger.info("Stripe client initialized")
         except ImportError:
@@ -35,6 +112,11 @@ class StripePaymentService:
         except Exception as e:
             logger.error(f"Failed to initialize Stripe: {e}")
 
+    def close(self):
+        """Close pooled Stripe connections"""
+        if self._http_client is not None:
+            self._http_client.close()
+
     def create_customer(
         self,
         email: str,
@@ -147,6 +229,32 @@ class StripePaymentService:
             return None
 
 
+def _paypal_api_base(sandbox: bool) -> str:
+    """Get the PayPal REST API base URL"""
+    return "https://api.sandbox.paypal.com" if sandbox else "https://api.paypal.com"
+
+
+def _paypal_basic_auth(client_id: Optional[str], client_secret: Optional[str]) -> str:
+    """Build the Basic auth header value for the OAuth token request"""
+    return "Basic " + base64.b64encode(
+        f"{client_id}:{client_secret}".encode()
+    ).decode()
+
+
+def _order_payload(amount: float, currency: str, description: str) -> Dict[str, Any]:
+    """Build the checkout order request body"""
+    return {
+        'intent': 'CAPTURE',
+        'purchase_units': [{
+            'amount': {
+                'currency_code': currency,
+                'value': str(amount)
+            },
+            'description': description
+        }]
+    }
+
+
 class PayPalPaymentService:
     """
     PayPal payment processing
@@ -157,36 +265,104 @@ class PayPalPaymentService:
     - Subscription management
     """
 
+    # Refresh this many seconds before PayPal's stated expiry
+    TOKEN_EXPIRY_MARGIN = 60
+    # Lifetime assumed when the token response omits expires_in
+    DEFAULT_TOKEN_LIFETIME = 900
+
     def __init__(self, client_id: Optional[str] = None, client_secret: Optional[str] = None):
         self.client_id = client_id
         self.client_secret = client_secret
         self.access_token = None
+        self.token_expiry = 0.0
+        self._token_lock = threading.Lock()
         self.sandbox = True  # Use sandbox for testing
+        self._session = self._create_session()
+
+    @staticmethod
+    def _create_session():
+        """
+        Create a pooled keep-alive session for PayPal API calls
+
+        Connection failures are retried; POSTs that reached the server are
+        not (urllib3 treats POST as non-idempotent), so orders are never
+        created twice.
+        """
+        if not REQUESTS_AVAILABLE:
+            logger.warning("requests package not installed; PayPal disabled")
+            return None
 
-    def _get_access_token(self) -> Optional[str]:
-        """Get PayPal access token"""
-        try:
-            import requests
-            import base64
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            max_retries=Retry(
+                total=2,
+                backoff_factor=0.2,
+                status_forcelist=[502, 503, 504]
+            )
+        )
+        session.mount("https://", adapter)
+        return session
+
+    def close(self):
+        """Close pooled PayPal connections"""
+        if self._session is not None:
+            self._session.close()
+
+    def _valid_token(self) -> bool:
+        """Check whether the cached access token can still be used"""
+        return bool(self.access_token) and time.monotonic() < self.token_expiry
+
+    @classmethod
+    def _token_lifetime(cls, token: dict) -> int:
+        """
+        Seconds to reuse an access token for
+
+        Refreshes TOKEN_EXPIRY_MARGIN seconds early, but never after less
+        than half the stated lifetime, so a short-lived token is still cached.
+
+        Args:
+            token: PayPal OAuth token response
+
+        Returns:
+            Cache lifetime in seconds
+        """
+        expires_in = int(token.get('expires_in') or cls.DEFAULT_TOKEN_LIFETIME)
+        return max(expires_in - cls.TOKEN_EXPIRY_MARGIN, expires_in // 2)
+
+    def _ensure_token(self) -> Optional[str]:
+        """Return a valid access token, refreshing it only when expired"""
+        if self._valid_token():
+            return self.access_token
 
-            url = "https://api.sandbox.paypal.com/v1/oauth2/token" if self.sandbox else \
-                  "https://api.paypal.com/v1/oauth2/token"
+        # Only one caller refreshes; the rest reuse its token
+        with self._token_lock:
+            if not self._valid_token():
+                self._get_access_token()
+        return self.access_token if self._valid_token() else None
 
-            auth = base64.b64encode(
-                f"{self.client_id}:{self.client_secret}".encode()
-            ).decode()
+    def _get_access_token(self) -> Optional[str]:
+        """Fetch a new PayPal access token and cache it until near expiry"""
+        if self._session is None:
+            return None
+
+        try:
+            url = f"{_paypal_api_base(self.sandbox)}/v1/oauth2/token"
 
             headers = {
-                'Authorization': f'Basic {auth}',
+                'Authorization': _paypal_basic_auth(self.client_id, self.client_secret),
                 'Content-Type': 'application/x-www-form-urlencoded'
             }
 
             data = {'grant_type': 'client_credentials'}
 
-            response = requests.post(url, headers=headers, data=data)
+            response = self._session.post(url, headers=headers, data=data)
             response.raise_for_status()
 
-            self.access_token = response.json()['access_token']
+            token = response.json()
+            self.access_token = token['access_token']
+            self.token_expiry = time.monotonic() + self._token_lifetime(token)
             return self.access_token
 
         except Exception as e:
@@ -200,35 +376,20 @@ class PayPalPaymentService:
         description: str = "Fraud Detection Service"
     ) -> Optional[Dict]:
         """Create a PayPal order"""
-        if not self.access_token:
-            self._get_access_token()
-
-        if not self.access_token:
+        if not self._ensure_token():
             return None
 
         try:
-            import requests
-
-            url = "https://api.sandbox.paypal.com/v2/checkout/orders" if self.sandbox else \
-                  "https://api.paypal.com/v2/checkout/orders"
+            url = f"{_paypal_api_base(self.sandbox)}/v2/checkout/orders"
 
             headers = {
                 'Authorization': f'Bearer {self.access_token}',
                 'Content-Type': 'application/json'
             }
 
-            payload = {
-                'intent': 'CAPTURE',
-                'purchase_units': [{
-                    'amount': {
-                        'currency_code': currency,
-                        'value': str(amount)
-                    },
-                    'description': description
-                }]
-            }
+            payload = _order_payload(amount, currency, description)
 
-            response = requests.post(url, headers=headers, json=payload)
+            response = self._session.post(url, headers=headers, json=payload)
             response.raise_for_status()
 
             order = response.json()
@@ -245,25 +406,148 @@ class PayPalPaymentService:
 
     def capture_order(self, order_id: str) -> Optional[Dict]:
         """Capture a PayPal order"""
-        if not self.access_token:
-            self._get_access_token()
-
-        if not self.access_token:
+        if not self._ensure_token():
             return None
 
         try:
-            import requests
-
-            url = f"https://api.sandbox.paypal.com/v2/checkout/orders/{order_id}/capture" \
-                  if self.sandbox else \
-                  f"https://api.paypal.com/v2/checkout/orders/{order_id}/capture"
+            url = f"{_paypal_api_base(self.sandbox)}/v2/checkout/orders/{order_id}/capture"
 
             headers = {
                 'Authorization': f'Bearer {self.access_token}',
                 'Content-Type': 'application/json'
             }
 
-            response = requests.post(url, headers=headers)
+            response = self._session.post(url, headers=headers)
+            response.raise_for_status()
+
+            capture = response.json()
+
+            return {
+                'id': capture['id'],
+                'status': capture['status'],
+                'payer': capture.get('payer', {})
+            }
+
+        except Exception as e:
+            logger.error(f"Failed to capture PayPal order: {e}")
+            return None
+
+
+class AsyncPayPalPaymentService:
+    """
+    Non-blocking PayPal payment processing for async request handlers
+
+    Uses one pooled httpx.AsyncClient for the lifetime of the app, so
+    checkouts never block the event loop. Token caching matches
+    PayPalPaymentService.
+    """
+
+    def __init__(self, client_id: Optional[str] = None, client_secret: Optional[str] = None):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.access_token = None
+        self.token_expiry = 0.0
+        self._token_lock = asyncio.Lock()
+        self.sandbox = True  # Use sandbox for testing
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get the shared HTTP client, creating it on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=30.0,
+                limits=httpx.Limits(max_keepalive_connections=16, max_connections=32)
+            )
+        return self._client
+
+    async def close(self):
+        """Close pooled PayPal connections (application shutdown)"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _valid_token(self) -> bool:
+        """Check whether the cached access token can still be used"""
+        return bool(self.access_token) and time.monotonic() < self.token_expiry
+
+    async def _ensure_token(self) -> Optional[str]:
+        """Return a valid access token, refreshing it only when expired"""
+        if self._valid_token():
+            return self.access_token
+
+        # Only one coroutine refreshes; the rest reuse its token
+        async with self._token_lock:
+            if not self._valid_token():
+                await self._get_access_token()
+        return self.access_token if self._valid_token() else None
+
+    async def _get_access_token(self) -> Optional[str]:
+        """Fetch a new PayPal access token and cache it until near expiry"""
+        try:
+            response = await self._get_client().post(
+                f"{_paypal_api_base(self.sandbox)}/v1/oauth2/token",
+                headers={
+                    'Authorization': _paypal_basic_auth(self.client_id, self.client_secret),
+                    'Content-Type': 'application/x-www-form-urlencoded'
+                },
+                data={'grant_type': 'client_credentials'}
+            )
+            response.raise_for_status()
+
+            token = response.json()
+            self.access_token = token['access_token']
+            self.token_expiry = (
+                time.monotonic() + PayPalPaymentService._token_lifetime(token)
+            )
+            return self.access_token
+
+        except Exception as e:
+            logger.error(f"Failed to get PayPal access token: {e}")
+            return None
+
+    async def create_order(
+        self,
+        amount: float,
+        currency: str = "USD",
+        description: str = "Fraud Detection Service"
+    ) -> Optional[Dict]:
+        """Create a PayPal order"""
+        if not await self._ensure_token():
+            return None
+
+        try:
+            response = await self._get_client().post(
+                f"{_paypal_api_base(self.sandbox)}/v2/checkout/orders",
+                headers={'Authorization': f'Bearer {self.access_token}'},
+                json=_order_payload(amount, currency, description)
+            )
+            response.raise_for_status()
+
+            order = response.json()
+
+            return {
+                'id': order['id'],
+                'status': order['status'],
+                'links': order['links']
+            }
+
+        except Exception as e:
+            logger.error(f"Failed to create PayPal order: {e}")
+            return None
+
+    async def capture_order(self, order_id: str) -> Optional[Dict]:
+        """Capture a PayPal order"""
+        if not await self._ensure_token():
+            return None
+
+        try:
+            response = await self._get_client().post(
+                f"{_paypal_api_base(self.sandbox)}/v2/checkout/orders/{order_id}/capture",
+                headers={
+                    'Authorization': f'Bearer {self.access_token}',
+                    'Content-Type': 'application/json'
+                }
+            )
             response.raise_for_status()
 
             capture = response.json()
@@ -282,3 +566,4 @@ class PayPalPaymentService:
 # Global service instances
 stripe_service = StripePaymentService()
 paypal_service = PayPalPaymentService()
+async_paypal_service = AsyncPayPalPaymentService()
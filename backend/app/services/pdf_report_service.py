@@ -3,24 +3,28 @@
 import io
 import logging
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, PageBreak
-from reportlab.graphics.shapes import Drawing
-from reportlab.graphics.charts.barcharts import VerticalBarChart
-from reportlab.graphics.charts.piecharts import Pie
-from reportlab.graphics.charts.lineplots import LinePlot
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-import matplotlib
-matplotlib.use('Agg')  # Non-GUI backend
-import matplotlib.pyplot as plt
-from sqlalchemy.orm import Session
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session, load_only
+
+from ..db.models import Prediction
+
+# reportlab.graphics adds ~300ms of imports, so chart modules are loaded
+# inside the chart builders, only when a report is rendered
+if TYPE_CHECKING:
+    from reportlab.graphics.shapes import Drawing
 
 logger = logging.getLogger(__name__)
 
+# Risk score at or above which a transaction counts as high risk
+HIGH_RISK_SCORE = 70
+
 
 class PDFReportService:
     """
@@ -33,6 +37,38 @@ class PDFReportService:
     - Custom branded reports
     """
 
+    # Table styles are immutable once built, so they are shared by every
+    # report instead of being re-parsed on each call
+    _META_STYLE = TableStyle([
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+    ])
+
+    _SUMMARY_STYLE = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3b82f6')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 10),
+    ])
+
+    _TXN_STYLE = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3b82f6')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 9),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
+    ])
+
     def __init__(self):
         self.styles = getSampleStyleSheet()
         self._setup_custom_styles()
@@ -72,18 +108,82 @@ class PDFReportService:
         ]
 
         meta_table = Table(metadata, colWidths=[2*inch, 4*inch])
-        meta_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ]))
+        meta_table.setStyle(self._META_STYLE)
 
         elements.append(meta_table)
         elements.append(Spacer(1, 0.3*inch))
 
         return elements
 
+    @staticmethod
+    def _load_report_stats(db: Session, user_id: int, days: int) -> Dict[str, Any]:
+        """Aggregate the user's prediction summary for the period in one query"""
+        cutoff = datetime.utcnow() - timedelta(days=days)
+
+        total, fraud_count, avg_risk, high_risk = db.query(
+            func.count(Prediction.id),
+            func.sum(case((Prediction.is_fraud, 1), else_=0)),
+            func.avg(Prediction.risk_score),
+            func.sum(case((Prediction.risk_score >= HIGH_RISK_SCORE, 1), else_=0))
+        ).filter(
+            Prediction.user_id == user_id,
+            Prediction.created_at >= cutoff
+        ).one()
+
+        total = total or 0
+        fraud_count = int(fraud_count or 0)
+
+        return {
+            'total_predictions': total,
+            'fraud_count': fraud_count,
+            'fraud_rate': fraud_count / total if total else 0.0,
+            'avg_risk_score': float(avg_risk or 0.0),
+            'high_risk_count': int(high_risk or 0)
+        }
+
+    @staticmethod
+    def _load_timeline(db: Session, user_id: int, days: int) -> List[Dict]:
+        """Daily prediction and fraud counts for the period, grouped in SQL"""
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        day = func.date(Prediction.created_at).label('day')
+
+        rows = db.query(
+            day,
+            func.count(Prediction.id),
+            func.sum(case((Prediction.is_fraud, 1), else_=0))
+        ).filter(
+            Prediction.user_id == user_id,
+            Prediction.created_at >= cutoff
+        ).group_by(day).order_by(day).all()
+
+        return [
+            {'date': str(d), 'fraud_count': int(fraud or 0), 'total_count': count}
+            for d, count, fraud in rows
+        ]
+
+    @staticmethod
+    def _load_recent_transactions(db: Session, user_id: int, limit: int = 20) -> List[Dict]:
+        """Newest predictions for the transaction table, without features_json"""
+        rows = db.query(Prediction).options(load_only(
+            Prediction.id,
+            Prediction.amount,
+            Prediction.risk_score,
+            Prediction.is_fraud,
+            Prediction.created_at
+        )).filter(
+            Prediction.user_id == user_id
+        ).order_by(Prediction.created_at.desc()).limit(limit)
+
+        return [
+            {
+                'date': p.created_at.strftime('%Y-%m-%d') if p.created_at else 'N/A',
+                'amount': p.amount,
+                'risk_score': p.risk_score,
+                'is_fraud': p.is_fraud
+            }
+            for p in rows
+        ]
+
     def _create_summary_table(self, stats: Dict[str, Any]) -> Table:
         """Create summary statistics table"""
         data = [
@@ -96,79 +196,102 @@ class PDFReportService:
         ]
 
         table = Table(data, colWidths=[3*inch, 2*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3b82f6')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 10),
-        ]))
+        table.setStyle(self._SUMMARY_STYLE)
 
         return table
 
-    def _create_fraud_chart(self, fraud_data: Dict[str, int]) -> Optional[Image]:
+    def _create_fraud_chart(self, fraud_data: Dict[str, int]) -> Optional["Drawing"]:
         """Create fraud statistics pie chart"""
         try:
-            fig, ax = plt.subplots(figsize=(6, 4))
+            from reportlab.graphics.charts.piecharts import Pie
+            from reportlab.graphics.shapes import Drawing, String
 
             labels = list(fraud_data.keys())
             sizes = list(fraud_data.values())
             colors_list = ['#22c55e', '#ef4444']
-
-            ax.pie(sizes, labels=labels, colors=colors_list, autopct='%1.1f%%', startangle=90)
-            ax.axis('equal')
-            ax.set_title('Fraud vs Legitimate Transactions')
-
-            # Save to buffer
-            buf = io.BytesIO()
-            plt.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-            plt.close()
-            buf.seek(0)
-
-            # Create ReportLab image
-            img = Image(buf, width=4*inch, height=3*inch)
-            return img
+            total = sum(sizes) or 1
+
+            drawing = Drawing(4*inch, 3*inch)
+            drawing.add(String(
+                2*inch, 2.8*inch, 'Fraud vs Legitimate Transactions',
+                fontName='Helvetica-Bold', fontSize=11, textAnchor='middle'
+            ))
+
+            pie = Pie()
+            pie.x = 1.1*inch
+            pie.y = 0.3*inch
+            pie.width = 1.8*inch
+            pie.height = 1.8*inch
+            pie.startAngle = 90
+            pie.direction = 'anticlockwise'
+            pie.data = sizes
+            pie.labels = [f"{label} ({size / total:.1%})" for label, size in zip(labels, sizes)]
+            pie.slices.strokeWidth = 0.5
+            pie.slices.fontSize = 9
+            for i, color in enumerate(colors_list[:len(sizes)]):
+                pie.slices[i].fillColor = colors.HexColor(color)
+
+            drawing.add(pie)
+            return drawing
 
         except Exception as e:
             logger.error(f"Failed to create chart: {e}")
             return None
 
-    def _create_timeline_chart(self, timeline_data: List[Dict]) -> Optional[Image]:
+    def _create_timeline_chart(self, timeline_data: List[Dict]) -> Optional["Drawing"]:
         """Create fraud detection timeline chart"""
         try:
             if not timeline_data:
                 return None
 
-            fig, ax = plt.subplots(figsize=(8, 4))
+            from reportlab.graphics.charts.legends import Legend
+            from reportlab.graphics.charts.linecharts import HorizontalLineChart
+            from reportlab.graphics.shapes import Drawing, String
+            from reportlab.graphics.widgets.markers import makeMarker
 
             dates = [d['date'] for d in timeline_data]
             fraud_counts = [d['fraud_count'] for d in timeline_data]
             total_counts = [d['total_count'] for d in timeline_data]
 
-            ax.plot(dates, fraud_counts, marker='o', color='#ef4444', label='Fraud', linewidth=2)
-            ax.plot(dates, total_counts, marker='s', color='#3b82f6', label='Total', linewidth=2)
-
-            ax.set_xlabel('Date')
-            ax.set_ylabel('Transaction Count')
-            ax.set_title('Transaction Timeline')
-            ax.legend()
-            ax.grid(True, alpha=0.3)
-
-            plt.xticks(rotation=45)
-
-            # Save to buffer
-            buf = io.BytesIO()
-            plt.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-            plt.close()
-            buf.seek(0)
-
-            img = Image(buf, width=6*inch, height=3*inch)
-            return img
+            drawing = Drawing(6*inch, 3*inch)
+            drawing.add(String(
+                3*inch, 2.8*inch, 'Transaction Timeline',
+                fontName='Helvetica-Bold', fontSize=11, textAnchor='middle'
+            ))
+
+            chart = HorizontalLineChart()
+            chart.x = 0.6*inch
+            chart.y = 0.6*inch
+            chart.width = 4.4*inch
+            chart.height = 1.9*inch
+            chart.data = [fraud_counts, total_counts]
+            chart.joinedLines = True
+            chart.categoryAxis.categoryNames = [str(d) for d in dates]
+            chart.categoryAxis.labels.angle = 45
+            chart.categoryAxis.labels.boxAnchor = 'ne'
+            chart.categoryAxis.labels.fontSize = 8
+            chart.valueAxis.valueMin = 0
+            chart.valueAxis.labels.fontSize = 8
+            chart.valueAxis.visibleGrid = True
+            chart.valueAxis.gridStrokeColor = colors.HexColor('#e5e7eb')
+
+            series = [('Fraud', '#ef4444', 'FilledCircle'), ('Total', '#3b82f6', 'FilledSquare')]
+            for i, (_, color, marker) in enumerate(series):
+                chart.lines[i].strokeColor = colors.HexColor(color)
+                chart.lines[i].strokeWidth = 2
+                chart.lines[i].symbol = makeMarker(marker)
+                chart.lines[i].symbol.fillColor = colors.HexColor(color)
+            drawing.add(chart)
+
+            legend = Legend()
+            legend.x = 5.2*inch
+            legend.y = 2.3*inch
+            legend.fontSize = 9
+            legend.alignment = 'right'
+            legend.colorNamePairs = [(colors.HexColor(color), name) for name, color, _ in series]
+            drawing.add(legend)
+
+            return drawing
 
         except Exception as e:
             logger.error(f"Failed to create timeline chart: {e}")
@@ -187,15 +310,7 @@ class PDFReportService:
             ])
 
         table = Table(data, colWidths=[1.5*inch, 1.5*inch, 1.5*inch, 1.5*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3b82f6')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
-        ]))
+        table.setStyle(self._TXN_STYLE)
 
         return table
 
@@ -229,14 +344,7 @@ class PDFReportService:
         elements.append(Paragraph("Executive Summary", self.styles['SectionHeader']))
         elements.append(Spacer(1, 0.1*inch))
 
-        # Get statistics (mock data for now - integrate with real DB)
-        stats = {
-            'total_predictions': 1250,
-            'fraud_count': 45,
-            'fraud_rate': 0.036,
-            'avg_risk_score': 23.5,
-            'high_risk_count': 78
-        }
+        stats = self._load_report_stats(db, user_id, days)
 
         elements.append(self._create_summary_table(stats))
         elements.append(Spacer(1, 0.3*inch))
@@ -256,13 +364,7 @@ class PDFReportService:
 
         # Timeline Chart
         elements.append(Paragraph("Transaction Timeline", self.styles['SectionHeader']))
-        timeline_data = [
-            {'date': 'Day 1', 'fraud_count': 2, 'total_count': 42},
-            {'date': 'Day 2', 'fraud_count': 1, 'total_count': 38},
-            {'date': 'Day 3', 'fraud_count': 3, 'total_count': 45},
-            {'date': 'Day 4', 'fraud_count': 1, 'total_count': 40},
-            {'date': 'Day 5', 'fraud_count': 2, 'total_count': 43},
-        ]
+        timeline_data = self._load_timeline(db, user_id, days)
         timeline_chart = self._create_timeline_chart(timeline_data)
         if timeline_chart:
             elements.append(timeline_chart)
@@ -270,11 +372,7 @@ class PDFReportService:
 
         # Recent Transactions
         elements.append(Paragraph("Recent Transactions", self.styles['SectionHeader']))
-        transactions = [
-            {'date': '2026-01-08', 'amount': 150.50, 'risk_score': 25.3, 'is_fraud': False},
-            {'date': '2026-01-08', 'amount': 1250.00, 'risk_score': 85.7, 'is_fraud': True},
-            {'date': '2026-01-07', 'amount': 45.20, 'risk_score': 12.1, 'is_fraud': False},
-        ]
+        transactions = self._load_recent_transactions(db, user_id)
         elements.append(self._create_transaction_table(transactions))
 
         # Build PDF
@@ -5,14 +5,25 @@ Author: Zhmuryk Andrii
 Copyright (c) 2024 - All Rights Reserved
 """
 
-import json
-from typing import List, Optional
+from datetime import datetime
+from operator import attrgetter
+from typing import Iterator, List, Optional, Tuple
 
+from sqlalchemy import case, func, insert, tuple_
 from sqlalchemy.orm import Session
 
+from ..core import fastjson
 from ..db.models import Prediction
 from ..models.schemas import TransactionInput, PredictionResponse
 
+# Batches above this size skip the ORM and go straight to a Core
+# executemany INSERT (multi-row VALUES on PostgreSQL, see db.database)
+CORE_INSERT_THRESHOLD = 1000
+
+# PCA feature names, in storage order
+_V_KEYS = tuple(f"v{i}" for i in range(1, 29))
+_v_getter = attrgetter(*_V_KEYS)
+
 
 def save_prediction(
     db: Session,
@@ -23,16 +34,13 @@ def save_prediction(
     """Save a prediction to the database"""
 
     # Convert PCA features to JSON
-    features = {
-        f"v{i}": getattr(transaction, f"v{i}")
-        for i in range(1, 29)
-    }
+    features = dict(zip(_V_KEYS, _v_getter(transaction)))
 
     db_prediction = Prediction(
         user_id=user_id,
         time=transaction.time,
         amount=transaction.amount,
-        features_json=json.dumps(features),
+        features_json=fastjson.dumps(features),
         is_fraud=result.is_fraud,
         fraud_probability=result.fraud_probability,
         confidence=result.confidence,
@@ -51,24 +59,78 @@ def get_user_predictions(
     db: Session,
     user_id: int,
     limit: int = 50,
-    offset: int = 0
+    offset: int = 0,
+    before: Optional[datetime] = None,
+    before_id: Optional[int] = None
 ) -> List[Prediction]:
-    """Get predictions for a specific user"""
-    return (
+    """
+    Get predictions for a specific user, newest first
+
+    Args:
+        db: Database session
+        user_id: Owner of the predictions
+        limit: Maximum number of rows
+        offset: Rows to skip; ignored when `before` is given
+        before: Keyset cursor timestamp, only rows ordered strictly after
+            (`before`, `before_id`) are returned. Preferred over `offset` for
+            deep pages (offset > 1000) since it is an index seek on
+            (user_id, created_at, id) rather than a scan over every skipped row.
+        before_id: Id half of the cursor. created_at alone is not unique
+            (a batch insert shares one timestamp), so without it rows tied
+            with the cursor are skipped; when omitted only `before` is used.
+
+    Returns:
+        List of predictions
+    """
+    query = (
         db.query(Prediction)
         .filter(Prediction.user_id == user_id)
-        .order_by(Prediction.created_at.desc())
-        .offset(offset)
-        .limit(limit)
-        .all()
+        .order_by(Prediction.created_at.desc(), Prediction.id.desc())
     )
+    if before is not None and before_id is not None:
+        query = query.filter(
+            tuple_(Prediction.created_at, Prediction.id) < tuple_(before, before_id)
+        )
+    elif before is not None:
+        query = query.filter(Prediction.created_at < before)
+    elif offset:
+        query = query.offset(offset)
+
+    return query.limit(limit).all()
+
+
+def get_user_predictions_page(
+    db: Session,
+    user_id: int,
+    limit: int = 50,
+    before: Optional[datetime] = None,
+    before_id: Optional[int] = None
+) -> Tuple[List[Prediction], Optional[Tuple[datetime, int]]]:
+    """
+    Get one keyset page of a user's predictions
+
+    Returns:
+        The rows and the (created_at, id) cursor to pass as `before` and
+        `before_id` for the next page, or None when this is the last page
+    """
+    rows = get_user_predictions(
+        db, user_id, limit=limit, before=before, before_id=before_id
+    )
+    if len(rows) < limit:
+        return rows, None
+    last = rows[-1]
+    return rows, (last.created_at, last.id)
 
 
 def get_user_prediction_stats(db: Session, user_id: int) -> dict:
     """Get prediction statistics for a user"""
-    predictions = db.query(Prediction).filter(Prediction.user_id == user_id).all()
+    total, fraud_count, avg_time = db.query(
+        func.count(Prediction.id),
+        func.sum(case((Prediction.is_fraud, 1), else_=0)),
+        func.avg(Prediction.prediction_time_ms)
+    ).filter(Prediction.user_id == user_id).one()
 
-    if not predictions:
+    if not total:
         return {
             "total_predictions": 0,
             "fraud_detected": 0,
@@ -77,17 +139,15 @@ def get_user_prediction_stats(db: Session, user_id: int) -> dict:
             "average_response_time_ms": 0.0
         }
 
-    total = len(predictions)
-    fraud_count = sum(1 for p in predictions if p.is_fraud)
+    fraud_count = int(fraud_count or 0)
     legitimate_count = total - fraud_count
-    avg_time = sum(p.prediction_time_ms for p in predictions) / total
 
     return {
         "total_predictions": total,
         "fraud_detected": fraud_count,
         "legitimate_detected": legitimate_count,
         "fraud_rate": fraud_count / total if total > 0 else 0.0,
-        "average_response_time_ms": avg_time
+        "average_response_time_ms": float(avg_time or 0.0)
     }
 
 
@@ -103,42 +163,45 @@ def save_batch_predictions(
     batch_id: str
 ) -> int:
     """Save batch predictions from a DataFrame to database"""
-    import pandas as pd
-
-    count = 0
-    for _, row in df.iterrows():
-        # Convert PCA features to JSON
-        features = {
-            f"v{i}": float(row[f'v{i}'])
-            for i in range(1, 29)
-        }
-
-        db_prediction = Prediction(
-            user_id=user_id,
-            time=float(row['time']),
-            amount=float(row['amount']),
-            features_json=json.dumps(features),
-            is_fraud=bool(row['is_fraud']),
-            fraud_probability=float(row['fraud_probability']),
-            confidence=str(row['confidence']),
-            risk_score=int(row['risk_score']),
-            prediction_time_ms=0.0,  # Batch doesn't track individual timing
-            batch_id=batch_id
-        )
-
-        db.add(db_prediction)
-        count += 1
+    # Pull all PCA features out as one float matrix, then zip each row
+    # with the precomputed key tuple
+    feature_rows = df[list(_V_KEYS)].to_numpy(dtype=float).tolist()
+    features_json = [
+        fastjson.dumps(dict(zip(_V_KEYS, row)))
+        for row in feature_rows
+    ]
 
+    records = df[["time", "amount"]].astype(float).assign(
+        is_fraud=df["is_fraud"].astype(bool),
+        fraud_probability=df["fraud_probability"].astype(float),
+        confidence=df["confidence"].astype(str),
+        risk_score=df["risk_score"].astype(int),
+        features_json=features_json,
+        user_id=user_id,
+        prediction_time_ms=0.0,  # Batch doesn't track individual timing
+        batch_id=batch_id
+    ).to_dict(orient="records")
+
+    if len(records) > CORE_INSERT_THRESHOLD:
+        db.execute(insert(Prediction.__table__), records)
+    else:
+        db.bulk_insert_mappings(Prediction, records)
     db.commit()
-    return count
+    return len(records)
 
 
 def get_batch_predictions(
     db: Session,
     user_id: int,
     batch_id: str
-) -> List[Prediction]:
-    """Get all predictions for a specific batch"""
+) -> Iterator[Prediction]:
+    """
+    Stream all predictions for a specific batch
+
+    Rows are fetched from a server-side cursor in chunks of 1000, so memory
+    stays bounded however large the batch is. Iterate the result; it is
+    not a list.
+    """
     return (
         db.query(Prediction)
         .filter(
@@ -146,7 +209,8 @@ def get_batch_predictions(
             Prediction.batch_id == batch_id
         )
         .order_by(Prediction.id)
-        .all()
+        .execution_options(stream_results=True)
+        .yield_per(1000)
     )
 
 
@@ -156,8 +220,6 @@ def get_user_batches(
     limit: int = 20
 ) -> List[dict]:
     """Get list of batch predictions for a user"""
-    from sqlalchemy import func
-
     results = (
         db.query(
             Prediction.batch_id,
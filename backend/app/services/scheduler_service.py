@@ -6,14 +6,27 @@ Copyright (c) 2024 - All Rights Reserved
 """
 
 import asyncio
+import heapq
 import logging
 from datetime import datetime, timedelta
-from typing import Callable, Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 
+from dateutil.relativedelta import relativedelta, MO
+from sqlalchemy import delete, select
+
 logger = logging.getLogger(__name__)
 
+# A failed task is retried after this many seconds
+RETRY_DELAY_SECONDS = 60
+
+# Scheduled tasks allowed to run at the same time; the rest wait their turn
+MAX_CONCURRENT_TASKS = 8
+
+# Maximum rows removed per DELETE (and per transaction) by cleanup tasks
+CLEANUP_CHUNK_SIZE = 10000
+
 
 class ScheduleFrequency(str, Enum):
     """Frequency options for scheduled tasks"""
@@ -23,7 +36,20 @@ class ScheduleFrequency(str, Enum):
     MONTHLY = "monthly"
 
 
-@dataclass
+_MIDNIGHT = {"hour": 0, "minute": 0, "second": 0, "microsecond": 0}
+
+# Per frequency: fields that truncate a time to the start of its period,
+# and the step from there to the next run. relativedelta clamps month
+# ends and rolls years, and MO lands on the Monday after the current day.
+_PERIODS = {
+    ScheduleFrequency.HOURLY: ({"minute": 0, "second": 0, "microsecond": 0}, relativedelta(hours=+1)),
+    ScheduleFrequency.DAILY: (_MIDNIGHT, relativedelta(days=+1)),
+    ScheduleFrequency.WEEKLY: (_MIDNIGHT, relativedelta(days=+1, weekday=MO)),
+    ScheduleFrequency.MONTHLY: ({"day": 1, **_MIDNIGHT}, relativedelta(months=+1)),
+}
+
+
+@dataclass(slots=True)
 class ScheduledTask:
     """Represents a scheduled task"""
     id: str
@@ -44,6 +70,20 @@ class SchedulerService:
         self.tasks: Dict[str, ScheduledTask] = {}
         self.running = False
         self._task: Optional[asyncio.Task] = None
+        # Min-heap of (next_run, task_id). Entries are never removed in
+        # place; stale ones are skipped when they reach the top.
+        self._heap: List[Tuple[datetime, str]] = []
+        # task_id -> next_run of its live heap entry, or None while running
+        self._pending: Dict[str, Optional[datetime]] = {}
+        # Set on any change that may move the earliest due time
+        self._wakeup = asyncio.Event()
+        self._slots = asyncio.Semaphore(MAX_CONCURRENT_TASKS)
+
+    def _schedule(self, task: ScheduledTask):
+        """Queue a task for its next_run and wake the loop"""
+        self._pending[task.id] = task.next_run
+        heapq.heappush(self._heap, (task.next_run, task.id))
+        self._wakeup.set()
 
     def add_task(
         self,
@@ -68,6 +108,7 @@ class SchedulerService:
         )
 
         self.tasks[task_id] = task
+        self._schedule(task)
         logger.info(f"Scheduled task '{name}' ({task_id}) - next run: {start_time}")
         return task
 
@@ -75,6 +116,8 @@ class SchedulerService:
         """Remove a scheduled task"""
         if task_id in self.tasks:
             del self.tasks[task_id]
+            self._pending.pop(task_id, None)
+            self._wakeup.set()
             logger.info(f"Removed task {task_id}")
             return True
         return False
@@ -89,7 +132,10 @@ class SchedulerService:
     def resume_task(self, task_id: str) -> bool:
         """Resume a paused task"""
         if task_id in self.tasks:
-            self.tasks[task_id].is_active = True
+            task = self.tasks[task_id]
+            task.is_active = True
+            if task_id not in self._pending:
+                self._schedule(task)
             return True
         return False
 
@@ -97,52 +143,80 @@ class SchedulerService:
         """Calculate the next run time based on frequency"""
         now = from_time or datetime.utcnow()
 
-        if frequency == ScheduleFrequency.HOURLY:
-            return now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
-        elif frequency == ScheduleFrequency.DAILY:
-            return now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
-        elif frequency == ScheduleFrequency.WEEKLY:
-            days_until_monday = (7 - now.weekday()) % 7 or 7
-            return now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=days_until_monday)
-        elif frequency == ScheduleFrequency.MONTHLY:
-            if now.month == 12:
-                return now.replace(year=now.year + 1, month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
-            return now.replace(month=now.month + 1, day=1, hour=0, minute=0, second=0, microsecond=0)
+        period = _PERIODS.get(frequency)
+        if period is None:
+            return now + timedelta(hours=1)
 
-        return now + timedelta(hours=1)
+        truncate, step = period
+        return now.replace(**truncate) + step
 
     async def _run_task(self, task: ScheduledTask):
-        """Execute a scheduled task"""
-        try:
-            logger.info(f"Running scheduled task: {task.name}")
+        """Execute a scheduled task and queue its next run"""
+        async with self._slots:
+            try:
+                logger.info(f"Running scheduled task: {task.name}")
+
+                if asyncio.iscoroutinefunction(task.function):
+                    await task.function(**task.kwargs)
+                else:
+                    task.function(**task.kwargs)
 
-            if asyncio.iscoroutinefunction(task.function):
-                await task.function(**task.kwargs)
-            else:
-                task.function(**task.kwargs)
+                task.last_run = datetime.utcnow()
+                task.run_count += 1
+                task.next_run = self._calculate_next_run(task.frequency, task.last_run)
 
-            task.last_run = datetime.utcnow()
-            task.run_count += 1
-            task.next_run = self._calculate_next_run(task.frequency, task.last_run)
+                logger.info(f"Task '{task.name}' completed. Next run: {task.next_run}")
 
-            logger.info(f"Task '{task.name}' completed. Next run: {task.next_run}")
+            except Exception as e:
+                logger.error(f"Error running task '{task.name}': {e}")
+                task.next_run = datetime.utcnow() + timedelta(seconds=RETRY_DELAY_SECONDS)
 
-        except Exception as e:
-            logger.error(f"Error running task '{task.name}': {e}")
+        # Skip if the task was removed or replaced while it ran
+        if self.tasks.get(task.id) is task:
+            self._schedule(task)
 
     async def _scheduler_loop(self):
-        """Main scheduler loop"""
+        """Main scheduler loop - sleeps until the earliest task is due"""
         logger.info("Scheduler started")
 
-        while self.running:
-            now = datetime.utcnow()
-
-            for task in list(self.tasks.values()):
-                if task.is_active and task.next_run <= now:
-                    asyncio.create_task(self._run_task(task))
+        # Local aliases keep global/attribute lookups out of the loop
+        heap = self._heap
+        pending = self._pending
+        tasks = self.tasks
+        wakeup = self._wakeup
+        utcnow = datetime.utcnow
+        heappop = heapq.heappop
+        create = asyncio.create_task
 
-            # Check every minute
-            await asyncio.sleep(60)
+        while self.running:
+            if not heap:
+                await wakeup.wait()
+                wakeup.clear()
+                continue
+
+            when, task_id = heap[0]
+            delay = (when - utcnow()).total_seconds()
+            if delay > 0:
+                # A task change interrupts the sleep so the head is re-read
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                wakeup.clear()
+                continue
+
+            heappop(heap)
+            if pending.get(task_id) != when:
+                continue  # stale entry
+
+            task = tasks.get(task_id)
+            if task is None or not task.is_active:
+                # Paused tasks are queued again by resume_task
+                pending.pop(task_id, None)
+                continue
+
+            pending[task_id] = None
+            create(self._run_task(task))
 
         logger.info("Scheduler stopped")
 
@@ -166,6 +240,9 @@ class SchedulerService:
 
     def get_status(self) -> Dict:
         """Get scheduler status"""
+        def iso(value: Optional[datetime]) -> Optional[str]:
+            return value.isoformat() if value else None
+
         return {
             "running": self.running,
             "task_count": len(self.tasks),
@@ -175,8 +252,8 @@ class SchedulerService:
                     "name": t.name,
                     "frequency": t.frequency.value,
                     "is_active": t.is_active,
-                    "next_run": t.next_run.isoformat() if t.next_run else None,
-                    "last_run": t.last_run.isoformat() if t.last_run else None,
+                    "next_run": iso(t.next_run),
+                    "last_run": iso(t.last_run),
                     "run_count": t.run_count
                 }
                 for t in self.tasks.values()
@@ -190,6 +267,36 @@ scheduler = SchedulerService()
 
 # ============== Built-in Scheduled Tasks ==============
 
+async def _delete_in_chunks(db, model, criterion, chunk_size: int = CLEANUP_CHUNK_SIZE) -> int:
+    """
+    Delete matching rows a chunk at a time, committing after each chunk
+
+    Each chunk is a single DELETE ... WHERE id IN (SELECT id ... LIMIT n),
+    so no transaction holds its locks for longer than one chunk, and the
+    event loop gets a turn between chunks.
+
+    Args:
+        db: Database session
+        model: Mapped class to delete from
+        criterion: Filter selecting the rows to delete
+        chunk_size: Maximum rows per DELETE
+
+    Returns:
+        Number of rows deleted
+    """
+    chunk = select(model.id).where(criterion).limit(chunk_size)
+    statement = delete(model).where(model.id.in_(chunk))
+    deleted = 0
+
+    while True:
+        count = db.execute(statement, execution_options={"synchronize_session": False}).rowcount
+        db.commit()
+        deleted += count
+        if count < chunk_size:
+            return deleted
+        await asyncio.sleep(0)
+
+
 async def generate_daily_report():
     """Generate daily fraud report"""
     from .report_service import generate_scheduled_report
@@ -211,8 +318,7 @@ async def cleanup_old_logs():
     db = SessionLocal()
     try:
         cutoff = datetime.utcnow() - timedelta(days=90)
-        deleted = db.query(AuditLog).filter(AuditLog.created_at < cutoff).delete()
-        db.commit()
+        deleted = await _delete_in_chunks(db, AuditLog, AuditLog.created_at < cutoff)
         logger.info(f"Cleaned up {deleted} old audit logs")
     except Exception as e:
         logger.error(f"Failed to cleanup logs: {e}")
@@ -221,6 +327,27 @@ async def cleanup_old_logs():
         db.close()
 
 
+async def cleanup_monitoring_data():
+    """Clean up API request logs and system metrics past retention"""
+    from ..core.config import settings
+    from ..db.database import SessionLocal
+    from .monitoring_service import APIRequestLog, SystemMetric
+    from datetime import datetime, timedelta
+
+    db = SessionLocal()
+    try:
+        cutoff = datetime.utcnow() - timedelta(days=settings.monitoring_retention_days)
+        deleted = 0
+        for model in (APIRequestLog, SystemMetric):
+            deleted += await _delete_in_chunks(db, model, model.timestamp < cutoff)
+        logger.info(f"Cleaned up {deleted} expired monitoring rows")
+    except Exception as e:
+        logger.error(f"Failed to cleanup monitoring data: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
 async def cleanup_expired_tokens():
     """Clean up expired refresh tokens"""
     from ..db.database import SessionLocal
@@ -229,11 +356,13 @@ async def cleanup_expired_tokens():
 
     db = SessionLocal()
     try:
-        deleted = db.query(RefreshToken).filter(
-            (RefreshToken.expires_at < datetime.utcnow()) |
-            (RefreshToken.is_revoked == True)
-        ).delete()
-        db.commit()
+        # Two passes rather than one OR, so each can use its partial index
+        deleted = await _delete_in_chunks(
+            db, RefreshToken,
+            (RefreshToken.is_revoked == False) &
+            (RefreshToken.expires_at < datetime.utcnow())
+        )
+        deleted += await _delete_in_chunks(db, RefreshToken, RefreshToken.is_revoked == True)
         logger.info(f"Cleaned up {deleted} expired/revoked tokens")
     except Exception as e:
         logger.error(f"Failed to cleanup tokens: {e}")
@@ -268,6 +397,14 @@ def setup_default_tasks():
         frequency=ScheduleFrequency.MONTHLY
     )
 
+    # Cleanup expired monitoring data daily
+    scheduler.add_task(
+        task_id="cleanup_monitoring",
+        name="Cleanup Expired Monitoring Data",
+        function=cleanup_monitoring_data,
+        frequency=ScheduleFrequency.DAILY
+    )
+
     # Cleanup expired tokens daily
     scheduler.add_task(
         task_id="cleanup_tokens",
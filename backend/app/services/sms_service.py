@@ -6,6 +6,28 @@ from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Message templates, kept together so wording (or a translation catalog)
+# is managed in one place
+_FRAUD_ALERT_TMPL = (
+    "🚨 FRAUD ALERT\n"
+    "Transaction #{transaction_id}\n"
+    "Amount: ${amount:.2f}\n"
+    "Risk Score: {risk_score:.1f}%\n"
+    "Please review immediately."
+)
+_VERIFICATION_TMPL = (
+    "Your verification code is: {code}\n"
+    "This code expires in 10 minutes.\n"
+    "Do not share this code with anyone."
+)
+_WEEKLY_SUMMARY_TMPL = (
+    "📊 Weekly Fraud Summary\n"
+    "Total Transactions: {total}\n"
+    "Fraud Detected: {fraud}\n"
+    "Fraud Rate: {rate:.1%}\n"
+    "Login to see full report."
+)
+
 
 class SMSService:
     """
@@ -105,12 +127,8 @@ class SMSService:
         risk_score: float
     ) -> bool:
         """Send fraud alert SMS"""
-        message = (
-            f"🚨 FRAUD ALERT\n"
-            f"Transaction #{transaction_id}\n"
-            f"Amount: ${amount:.2f}\n"
-            f"Risk Score: {risk_score:.1f}%\n"
-            f"Please review immediately."
+        message = _FRAUD_ALERT_TMPL.format(
+            transaction_id=transaction_id, amount=amount, risk_score=risk_score
         )
 
         return self.send_sms(to_number, message, priority="high")
@@ -121,11 +139,7 @@ class SMSService:
         code: str
     ) -> bool:
         """Send verification code SMS"""
-        message = (
-            f"Your verification code is: {code}\n"
-            f"This code expires in 10 minutes.\n"
-            f"Do not share this code with anyone."
-        )
+        message = _VERIFICATION_TMPL.format(code=code)
 
         return self.send_sms(to_number, message, priority="high")
 
@@ -135,12 +149,10 @@ class SMSService:
         stats: Dict[str, Any]
     ) -> bool:
         """Send weekly summary SMS"""
-        message = (
-            f"📊 Weekly Fraud Summary\n"
-            f"Total Transactions: {stats.get('total', 0)}\n"
-            f"Fraud Detected: {stats.get('fraud', 0)}\n"
-            f"Fraud Rate: {stats.get('rate', 0):.1%}\n"
-            f"Login to see full report."
+        message = _WEEKLY_SUMMARY_TMPL.format(
+            total=stats.get('total', 0),
+            fraud=stats.get('fraud', 0),
+            rate=stats.get('rate', 0)
         )
 
         return self.send_sms(to_number, message, priority="low")
@@ -5,13 +5,70 @@ Author: Zhmuryk Andrii
 Copyright (c) 2024 - All Rights Reserved
 """
 
-from typing import List, Optional
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
 
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, delete, exists, insert, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, make_transient_to_detached
 
 from ..db.models import Team, User, team_members
 
+# Column snapshots of recently read teams, keyed by id. The cache is per
+# process: other workers may see an update up to the TTL late.
+TEAM_CACHE_TTL_SECONDS = 30
+TEAM_CACHE_MAX_SIZE = 10000
+
+_TEAM_COLUMNS = tuple(attr.key for attr in inspect(Team).column_attrs)
+_team_cache: "OrderedDict[int, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+_team_cache_lock = threading.Lock()
+
+
+def _cache_team(team: Team) -> None:
+    """Snapshot a team's columns into the cache"""
+    snapshot = {key: getattr(team, key) for key in _TEAM_COLUMNS}
+    with _team_cache_lock:
+        _team_cache[team.id] = (time.monotonic() + TEAM_CACHE_TTL_SECONDS, snapshot)
+        _team_cache.move_to_end(team.id)
+        while len(_team_cache) > TEAM_CACHE_MAX_SIZE:
+            _team_cache.popitem(last=False)
+
+
+def _cached_team(team_id: int) -> Optional[Dict[str, Any]]:
+    """Return a fresh cached snapshot, or None"""
+    with _team_cache_lock:
+        entry = _team_cache.get(team_id)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del _team_cache[team_id]
+            return None
+        return entry[1]
+
+
+def invalidate_team(team_id: int) -> None:
+    """Drop a team from the cache after it changes"""
+    with _team_cache_lock:
+        _team_cache.pop(team_id, None)
+
+
+def _membership(team_id: int, user_id: int):
+    """WHERE clause matching one team_members row"""
+    return and_(team_members.c.team_id == team_id, team_members.c.user_id == user_id)
+
+
+def _insert_ignore(db: Session):
+    """INSERT into team_members that skips rows already present"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(team_members).on_conflict_do_nothing()
+    if dialect == "sqlite":
+        return sqlite.insert(team_members).on_conflict_do_nothing()
+    return insert(team_members)
+
 
 def create_team(db: Session, name: str, owner_id: int, description: Optional[str] = None) -> Team:
     """Create a new team"""
@@ -33,16 +90,33 @@ def create_team(db: Session, name: str, owner_id: int, description: Optional[str
 
 
 def get_team(db: Session, team_id: int) -> Optional[Team]:
-    """Get a team by ID"""
-    return db.query(Team).filter(Team.id == team_id).first()
+    """
+    Get a team by ID
+
+    Served from the team cache when possible: the snapshot is merged into
+    the session without a SELECT, so the result is a normal persistent
+    instance (relationships such as members still lazy-load).
+    """
+    snapshot = _cached_team(team_id)
+    if snapshot is not None:
+        team = Team(**snapshot)
+        make_transient_to_detached(team)
+        return db.merge(team, load=False)
+
+    team = db.query(Team).filter(Team.id == team_id).first()
+    if team is not None:
+        _cache_team(team)
+    return team
 
 
 def get_user_teams(db: Session, user_id: int) -> List[Team]:
     """Get all teams a user belongs to"""
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        return []
-    return user.teams
+    return (
+        db.query(Team)
+        .join(team_members, team_members.c.team_id == Team.id)
+        .filter(team_members.c.user_id == user_id)
+        .all()
+    )
 
 
 def get_owned_teams(db: Session, user_id: int) -> List[Team]:
@@ -52,16 +126,20 @@ def get_owned_teams(db: Session, user_id: int) -> List[Team]:
 
 def add_team_member(db: Session, team_id: int, user_id: int) -> bool:
     """Add a user to a team"""
-    team = get_team(db, team_id)
-    user = db.query(User).filter(User.id == user_id).first()
+    team_found, user_found, is_member = db.query(
+        exists().where(Team.id == team_id),
+        exists().where(User.id == user_id),
+        exists().where(_membership(team_id, user_id))
+    ).one()
 
-    if not team or not user:
+    if not team_found or not user_found:
         return False
 
-    if user in team.members:
+    if is_member:
         return True  # Already a member
 
-    team.members.append(user)
+    # Conflict-tolerant in case a concurrent request added the same row
+    db.execute(_insert_ignore(db).values(team_id=team_id, user_id=user_id))
     db.commit()
 
     return True
@@ -88,14 +166,10 @@ def remove_team_member(db: Session, team_id: int, user_id: int, requester_id: in
             detail="Cannot remove team owner"
         )
 
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user or user not in team.members:
-        return False
-
-    team.members.remove(user)
+    removed = db.execute(delete(team_members).where(_membership(team_id, user_id))).rowcount
     db.commit()
 
-    return True
+    return removed > 0
 
 
 def update_team(
@@ -124,6 +198,7 @@ def update_team(
         team.description = description
 
     db.commit()
+    invalidate_team(team_id)
     db.refresh(team)
 
     return team
@@ -145,26 +220,21 @@ def delete_team(db: Session, team_id: int, requester_id: int) -> bool:
 
     team.is_active = False
     db.commit()
+    invalidate_team(team_id)
 
     return True
 
 
 def get_team_members(db: Session, team_id: int) -> List[User]:
     """Get all members of a team"""
-    team = get_team(db, team_id)
-    if not team:
-        return []
-    return team.members
+    return (
+        db.query(User)
+        .join(team_members, team_members.c.user_id == User.id)
+        .filter(team_members.c.team_id == team_id)
+        .all()
+    )
 
 
 def is_team_member(db: Session, team_id: int, user_id: int) -> bool:
     """Check if a user is a member of a team"""
-    team = get_team(db, team_id)
-    if not team:
-        return False
-
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        return False
-
-    return user in team.members
+    return db.query(exists().where(_membership(team_id, user_id))).scalar()
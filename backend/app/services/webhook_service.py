@@ -5,22 +5,54 @@ Author: Zhmuryk Andrii
 Copyright (c) 2024 - All Rights Reserved
 """
 
-import json
+import asyncio
+import heapq
+import itertools
 import hmac
 import hashlib
 import logging
+import random
+import time
 import httpx
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Set, Tuple, Union
 
 from sqlalchemy.orm import Session
 from sqlalchemy import desc
 
+from ..core import fastjson
+from ..core.http2 import HTTP2_AVAILABLE
+from ..db.database import SessionLocal
 from ..db.models import Webhook
 
 logger = logging.getLogger(__name__)
 
 
+# Delivery attempts per event, including the first one
+WEBHOOK_MAX_ATTEMPTS = 5
+# Retry n waits RETRY_BASE_DELAY_SECONDS * 2**(n-1) plus up to 1s of jitter
+RETRY_BASE_DELAY_SECONDS = 2.0
+# Pending redeliveries kept in memory; further failures are not retried
+MAX_PENDING_RETRIES = 10000
+# A webhook is deactivated once its consecutive failures exceed this
+DISABLE_AFTER_FAILURES = 100
+
+
+# Keyed HMAC-SHA256 states by secret, copied per signature so the key
+# schedule runs once per secret rather than once per delivery
+_HMAC_CACHE_MAX_SIZE = 1024
+_hmac_templates: Dict[str, "hmac.HMAC"] = {}
+
+
+def _is_success(status_code: Optional[int]) -> bool:
+    return status_code is not None and 200 <= status_code < 300
+
+
+def _is_retryable(status_code: Optional[int]) -> bool:
+    """Network errors, throttling and server errors are worth retrying"""
+    return status_code is None or status_code == 429 or status_code >= 500
+
+
 class WebhookService:
     """Service for managing and triggering webhooks"""
 
@@ -32,6 +64,27 @@ class WebhookService:
         "threshold_exceeded"
     ]
 
+    # Shared client so deliveries reuse pooled keep-alive connections
+    _client: Optional[httpx.AsyncClient] = None
+
+    @classmethod
+    def _get_client(cls) -> httpx.AsyncClient:
+        """Get the shared webhook HTTP client, creating it on first use"""
+        if cls._client is None or cls._client.is_closed:
+            cls._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                timeout=10.0,
+                limits=httpx.Limits(max_keepalive_connections=100, max_connections=200)
+            )
+        return cls._client
+
+    @classmethod
+    async def close_client(cls) -> None:
+        """Close the shared webhook HTTP client (application shutdown)"""
+        if cls._client is not None:
+            await cls._client.aclose()
+            cls._client = None
+
     @staticmethod
     def create_webhook(
         db: Session,
@@ -52,7 +105,7 @@ class WebhookService:
             name=name,
             url=url,
             secret=secret,
-            event_types=json.dumps(event_types),
+            event_types=fastjson.dumps(event_types),
             is_active=True
         )
 
@@ -96,7 +149,7 @@ class WebhookService:
             invalid_events = [e for e in event_types if e not in WebhookService.VALID_EVENTS]
             if invalid_events:
                 raise ValueError(f"Invalid event types: {invalid_events}")
-            webhook.event_types = json.dumps(event_types)
+            webhook.event_types = fastjson.dumps(event_types)
         if secret is not None:
             webhook.secret = secret
         if is_active is not None:
@@ -114,13 +167,21 @@ class WebhookService:
         db.commit()
 
     @staticmethod
-    def generate_signature(payload: str, secret: str) -> str:
+    def generate_signature(payload: Union[str, bytes], secret: str) -> str:
         """Generate HMAC-SHA256 signature for webhook payload"""
-        return hmac.new(
-            secret.encode('utf-8'),
-            payload.encode('utf-8'),
-            hashlib.sha256
-        ).hexdigest()
+        if isinstance(payload, str):
+            payload = payload.encode('utf-8')
+
+        template = _hmac_templates.get(secret)
+        if template is None:
+            if len(_hmac_templates) >= _HMAC_CACHE_MAX_SIZE:
+                _hmac_templates.clear()
+            template = hmac.new(secret.encode('utf-8'), digestmod=hashlib.sha256)
+            _hmac_templates[secret] = template
+
+        mac = template.copy()
+        mac.update(payload)
+        return mac.hexdigest()
 
     @staticmethod
     async def trigger_webhook(
@@ -130,62 +191,111 @@ class WebhookService:
         payload: Dict[str, Any]
     ) -> bool:
         """Trigger a webhook with the given payload"""
-        if not webhook.is_active:
+        request = WebhookService._build_request(webhook, event_type, payload)
+        if request is None:
             return False
 
+        payload_bytes, headers = request
+        status_code = await WebhookService._deliver(webhook, payload_bytes, headers)
+        WebhookService._record_outcome(webhook, status_code)
+        db.commit()
+        return WebhookService._settle(webhook, payload_bytes, headers, status_code)
+
+    @staticmethod
+    def _build_request(
+        webhook: Webhook,
+        event_type: str,
+        payload: Dict[str, Any]
+    ) -> Optional[Tuple[bytes, Dict[str, str]]]:
+        """Serialize and sign an event for one webhook, or None if it does not apply"""
+        if not webhook.is_active:
+            return None
+
         # Check if webhook subscribes to this event
-        subscribed_events = json.loads(webhook.event_types)
-        if event_type not in subscribed_events:
-            return False
+        if event_type not in webhook.subscribed_events:
+            return None
 
         # Prepare payload
+        timestamp = datetime.utcnow().isoformat()
         full_payload = {
             "event": event_type,
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": timestamp,
             "data": payload
         }
-        payload_str = json.dumps(full_payload)
+        # Serialized straight to the bytes that are signed and sent
+        payload_bytes = fastjson.dumps_bytes(full_payload)
 
         headers = {
             "Content-Type": "application/json",
             "X-Webhook-Event": event_type,
-            "X-Webhook-Timestamp": datetime.utcnow().isoformat()
+            "X-Webhook-Timestamp": timestamp
         }
 
         # Add signature if secret is configured
         if webhook.secret:
-            signature = WebhookService.generate_signature(payload_str, webhook.secret)
+            signature = WebhookService.generate_signature(payload_bytes, webhook.secret)
             headers["X-Webhook-Signature"] = f"sha256={signature}"
 
-        try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(
-                    webhook.url,
-                    content=payload_str,
-                    headers=headers
-                )
-
-            # Update webhook status
-            webhook.last_triggered_at = datetime.utcnow()
-            webhook.last_status_code = response.status_code
-
-            if response.is_success:
-                webhook.failure_count = 0
-                db.commit()
-                logger.info(f"Webhook {webhook.id} triggered successfully: {response.status_code}")
-                return True
-            else:
-                webhook.failure_count += 1
-                db.commit()
-                logger.warning(f"Webhook {webhook.id} failed: {response.status_code}")
-                return False
+        return payload_bytes, headers
 
+    @staticmethod
+    async def _deliver(
+        webhook: Webhook,
+        payload_bytes: bytes,
+        headers: Dict[str, str]
+    ) -> Optional[int]:
+        """
+        POST a signed body once
+
+        Only the network call happens here; the caller records the outcome
+        with _record_outcome and commits, so concurrent deliveries sharing
+        one Session never commit (and expire each other) mid-flight.
+
+        Returns:
+            The response status code, or None if the request itself failed
+        """
+        try:
+            response = await WebhookService._get_client().post(
+                webhook.url,
+                content=payload_bytes,
+                headers=headers
+            )
         except Exception as e:
-            webhook.last_triggered_at = datetime.utcnow()
-            webhook.failure_count += 1
-            db.commit()
             logger.error(f"Webhook {webhook.id} error: {str(e)}")
-            return False
+            return None
+
+        if response.is_success:
+            logger.info(f"Webhook {webhook.id} triggered successfully: {response.status_code}")
+        else:
+            logger.warning(f"Webhook {webhook.id} failed: {response.status_code}")
+        return response.status_code
+
+    @staticmethod
+    def _record_outcome(webhook: Webhook, status_code: Optional[int]) -> None:
+        """Update a webhook's delivery status fields (not committed)"""
+        webhook.last_triggered_at = datetime.utcnow()
+        if status_code is not None:
+            webhook.last_status_code = status_code
+
+        if _is_success(status_code):
+            webhook.failure_count = 0
+        else:
+            webhook.failure_count += 1
+
+    @staticmethod
+    def _settle(
+        webhook: Webhook,
+        payload_bytes: bytes,
+        headers: Dict[str, str],
+        status_code: Optional[int]
+    ) -> bool:
+        """Queue a redelivery for a retryable failure; True if delivered"""
+        if _is_success(status_code):
+            return True
+
+        if _is_retryable(status_code):
+            webhook_retry_queue.schedule(webhook.id, payload_bytes, headers, attempts=1)
+        return False
 
     @staticmethod
     async def trigger_webhooks_for_event(
@@ -194,27 +304,54 @@ class WebhookService:
         event_type: str,
         payload: Dict[str, Any]
     ) -> Dict[str, int]:
-        """Trigger all user webhooks for a specific event"""
-        webhooks = db.query(Webhook).filter(
+        """
+        Trigger all user webhooks for a specific event
+
+        Deliveries run concurrently, so the call takes as long as the
+        slowest webhook rather than the sum of all of them. Webhooks not
+        subscribed to the event are filtered out in SQL and never loaded,
+        so "skipped" only counts rows the SQL pre-filter let through that
+        the exact subscription check then rejected.
+
+        Returns:
+            Counts of "success", "failed" and "skipped" webhooks
+        """
+        # Substring match on the JSON array narrows the rows in the
+        # database; the exact check below guards against partial matches
+        candidates = db.query(Webhook).filter(
             Webhook.user_id == user_id,
-            Webhook.is_active == True
+            Webhook.is_active == True,
+            Webhook.event_types.contains(f'"{event_type}"', autoescape=True)
         ).all()
 
-        results = {"success": 0, "failed": 0, "skipped": 0}
+        subscribed = [w for w in candidates if event_type in w.subscribed_events]
+        skipped = len(candidates) - len(subscribed)
+        if not subscribed:
+            return {"success": 0, "failed": 0, "skipped": skipped}
+
+        requests = [
+            (w, WebhookService._build_request(w, event_type, payload))
+            for w in subscribed
+        ]
+        status_codes = await asyncio.gather(
+            *(WebhookService._deliver(w, body, headers) for w, (body, headers) in requests)
+        )
 
-        for webhook in webhooks:
-            subscribed_events = json.loads(webhook.event_types)
-            if event_type not in subscribed_events:
-                results["skipped"] += 1
-                continue
+        # Record every outcome, then commit once for the whole fan-out
+        for w, status_code in zip(subscribed, status_codes):
+            WebhookService._record_outcome(w, status_code)
+        db.commit()
 
-            success = await WebhookService.trigger_webhook(db, webhook, event_type, payload)
-            if success:
-                results["success"] += 1
-            else:
-                results["failed"] += 1
+        success = sum(
+            WebhookService._settle(w, body, headers, status_code)
+            for (w, (body, headers)), status_code in zip(requests, status_codes)
+        )
 
-        return results
+        return {
+            "success": success,
+            "failed": len(subscribed) - success,
+            "skipped": skipped
+        }
 
     @staticmethod
     async def test_webhook(db: Session, webhook: Webhook) -> Dict[str, Any]:
@@ -235,3 +372,114 @@ class WebhookService:
             "status_code": webhook.last_status_code,
             "message": "Test webhook sent successfully" if success else "Test webhook failed"
         }
+
+
+class WebhookRetryQueue:
+    """
+    Background redelivery of failed webhook posts
+
+    Failed deliveries are parked in a heap ordered by when they are due,
+    with exponential backoff and jitter, so the code that triggered the
+    webhook never waits on a flaky endpoint. Each retry re-sends the
+    original signed body. Pending retries live in memory only and are
+    dropped on shutdown.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, int, bytes, Dict[str, str], int]] = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._inflight: Set[asyncio.Task] = set()
+        self._task: Optional[asyncio.Task] = None
+        self.running = False
+
+    def schedule(self, webhook_id: int, payload_bytes: bytes, headers: Dict[str, str], attempts: int) -> bool:
+        """
+        Queue a redelivery after `attempts` failed tries
+
+        Returns:
+            False when the delivery will not be retried
+        """
+        if not self.running or attempts >= WEBHOOK_MAX_ATTEMPTS:
+            return False
+        if len(self._heap) >= MAX_PENDING_RETRIES:
+            logger.warning(f"Webhook retry queue full, dropping retry for webhook {webhook_id}")
+            return False
+
+        due = time.monotonic() + RETRY_BASE_DELAY_SECONDS * 2 ** (attempts - 1) + random.random()
+        heapq.heappush(self._heap, (due, next(self._seq), webhook_id, payload_bytes, headers, attempts))
+        self._wakeup.set()
+        return True
+
+    async def _retry_loop(self):
+        """Sleep until the earliest retry is due, then hand it off"""
+        while self.running:
+            if not self._heap:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+
+            delay = self._heap[0][0] - time.monotonic()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+
+            _, _, webhook_id, payload_bytes, headers, attempts = heapq.heappop(self._heap)
+            task = asyncio.create_task(self._redeliver(webhook_id, payload_bytes, headers, attempts))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _redeliver(self, webhook_id: int, payload_bytes: bytes, headers: Dict[str, str], attempts: int):
+        """Re-send one delivery with a fresh session"""
+        db = SessionLocal()
+        try:
+            webhook = db.get(Webhook, webhook_id)
+            if webhook is None or not webhook.is_active:
+                return
+
+            attempts += 1
+            status_code = await WebhookService._deliver(
+                webhook, payload_bytes, {**headers, "X-Webhook-Attempt": str(attempts)}
+            )
+            WebhookService._record_outcome(webhook, status_code)
+            disable = not _is_success(status_code) and webhook.failure_count > DISABLE_AFTER_FAILURES
+            if disable:
+                webhook.is_active = False
+            db.commit()
+
+            if _is_success(status_code):
+                return
+            if disable:
+                logger.warning(f"Webhook {webhook_id} disabled after {webhook.failure_count} consecutive failures")
+            elif _is_retryable(status_code):
+                self.schedule(webhook_id, payload_bytes, headers, attempts)
+        except Exception as e:
+            logger.error(f"Webhook {webhook_id} retry error: {e}")
+        finally:
+            db.close()
+
+    async def start(self):
+        """Start the background retry task"""
+        if self.running:
+            return
+
+        self.running = True
+        self._task = asyncio.create_task(self._retry_loop())
+
+    async def stop(self):
+        """Stop retrying; pending and in-flight retries are abandoned"""
+        self.running = False
+        tasks = [t for t in (self._task, *self._inflight) if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._heap.clear()
+
+
+# Global retry queue instance
+webhook_retry_queue = WebhookRetryQueue()
@@ -5,58 +5,91 @@ Author: Zhmuryk Andrii
 Copyright (c) 2024 - All Rights Reserved
 """
 
-import json
+import asyncio
 import logging
-from typing import Dict, List, Optional
+from typing import Dict, Optional, Union
 from dataclasses import dataclass, field
 from datetime import datetime
 
 from fastapi import WebSocket, WebSocketDisconnect
 
+from ..core import fastjson
+
 logger = logging.getLogger(__name__)
 
 
+# Outbound messages buffered per socket; the oldest is dropped when full
+SEND_QUEUE_SIZE = 256
+
+
 @dataclass
 class ConnectionManager:
-    """Manages WebSocket connections"""
-    active_connections: Dict[int, List[WebSocket]] = field(default_factory=dict)
+    """
+    Manages WebSocket connections
+
+    Every socket has a bounded outbound queue drained by its own writer
+    task, so senders never wait on the network and a slow client only
+    delays (and eventually loses) its own messages.
+    """
+    active_connections: Dict[int, Dict[WebSocket, asyncio.Queue]] = field(default_factory=dict)
+    _writers: Dict[WebSocket, asyncio.Task] = field(default_factory=dict)
 
     async def connect(self, websocket: WebSocket, user_id: int):
         """Accept and store a WebSocket connection"""
         await websocket.accept()
-        if user_id not in self.active_connections:
-            self.active_connections[user_id] = []
-        self.active_connections[user_id].append(websocket)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SEND_QUEUE_SIZE)
+        self.active_connections.setdefault(user_id, {})[websocket] = queue
+        self._writers[websocket] = asyncio.create_task(self._writer(websocket, queue, user_id))
         logger.info(f"User {user_id} connected via WebSocket")
 
     def disconnect(self, websocket: WebSocket, user_id: int):
         """Remove a WebSocket connection"""
-        if user_id in self.active_connections:
-            if websocket in self.active_connections[user_id]:
-                self.active_connections[user_id].remove(websocket)
-            if not self.active_connections[user_id]:
+        connections = self.active_connections.get(user_id)
+        if connections is not None:
+            connections.pop(websocket, None)
+            if not connections:
                 del self.active_connections[user_id]
+
+        writer = self._writers.pop(websocket, None)
+        if writer is not None and writer is not asyncio.current_task():
+            writer.cancel()
         logger.info(f"User {user_id} disconnected from WebSocket")
 
-    async def send_personal_message(self, message: dict, user_id: int):
-        """Send a message to a specific user"""
-        if user_id in self.active_connections:
-            disconnected = []
-            for websocket in self.active_connections[user_id]:
-                try:
-                    await websocket.send_json(message)
-                except Exception as e:
-                    logger.warning(f"Failed to send message to user {user_id}: {e}")
-                    disconnected.append(websocket)
-
-            # Clean up disconnected sockets
-            for ws in disconnected:
-                self.disconnect(ws, user_id)
+    async def _writer(self, websocket: WebSocket, queue: asyncio.Queue, user_id: int):
+        """Drain one socket's queue, dropping the socket if a send fails"""
+        while True:
+            payload = await queue.get()
+            try:
+                await websocket.send_text(payload)
+            except Exception as e:
+                logger.warning(f"Failed to send message to user {user_id}: {e}")
+                self.disconnect(websocket, user_id)
+                return
+
+    @staticmethod
+    def _enqueue(queue: asyncio.Queue, payload: str):
+        """Queue a payload without waiting, evicting the oldest if full"""
+        try:
+            queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            queue.get_nowait()
+            queue.put_nowait(payload)
+
+    async def send_personal_message(self, message: Union[dict, str], user_id: int):
+        """Send a message (dict, or already-serialized JSON text) to a specific user"""
+        connections = self.active_connections.get(user_id)
+        if connections:
+            payload = message if isinstance(message, str) else fastjson.dumps(message)
+            for queue in connections.values():
+                self._enqueue(queue, payload)
 
     async def broadcast(self, message: dict):
         """Send a message to all connected users"""
-        for user_id in list(self.active_connections.keys()):
-            await self.send_personal_message(message, user_id)
+        # Serialized once, however many sockets receive it
+        payload = fastjson.dumps(message)
+        for connections in self.active_connections.values():
+            for queue in connections.values():
+                self._enqueue(queue, payload)
 
     def get_connection_count(self) -> int:
         """Get total number of active connections"""
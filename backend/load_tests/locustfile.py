@@ -1,20 +1,103 @@
 """
 Locust Load Testing for Fraud Detection API
 
+Users run on FastHttpUser (geventhttpclient), which costs far less client
+CPU per request than the requests-based HttpUser, so one worker process
+can drive many more users before the load generator becomes the limit.
+
 Run with:
     locust -f locustfile.py --host=http://localhost:8000
 
 Or headless:
     locust -f locustfile.py --host=http://localhost:8000 --headless -u 100 -r 10 -t 60s
+
+One Locust process is bound to one core; past roughly 500-1000 users per
+process the load generator, not the API, becomes the bottleneck. Spread
+users over worker processes, either on one machine:
+    locust -f locustfile.py --host=http://localhost:8000 --processes -1
+
+or across machines (one master, any number of workers):
+    locust -f locustfile.py --master --host=http://api-host:8000
+    locust -f locustfile.py --worker --master-host=<master-ip>
+
+Every user holds its own keep-alive connections, so thousands of users
+need thousands of sockets; raise the open-file limit on each load
+generator first:
+    ulimit -n 65535
+
+For pure throughput runs set LOCUST_FAST=1: responses are then judged by
+status code alone and their bodies drained without being decompressed.
+
+Add shapes.py to ramp up in stages to 3000 users instead of using -u/-r:
+    locust -f locustfile.py,shapes.py --master --host=http://api-host:8000 --headless
 """
 
 import json
+import os
 import random
-from locust import HttpUser, task, between, events
+
+import numpy as np
+from locust import task, between, events
+from locust.contrib.fasthttp import FastHttpUser
 from locust.runners import MasterRunner
 
+# Feature rows are drawn once at import; tasks only pick a row by index
+_POOL_SIZE = 4096
+_FIELDS = [f"v{i}" for i in range(1, 29)]
+_LEGIT_POOL = np.random.normal(0, 1, (_POOL_SIZE, 28)).astype(np.float32)
+_FRAUD_POOL = np.random.normal(-2, 2, (_POOL_SIZE, 28)).astype(np.float32)
+
+
+def _sample_features(pool):
+    """Pick a random pre-generated feature row as a v1..v28 dict"""
+    return dict(zip(_FIELDS, pool[random.randrange(_POOL_SIZE)].tolist()))
+
+
+# LOCUST_FAST=1 skips decoding response bodies; only the status is checked
+FAST_MODE = os.environ.get("LOCUST_FAST") == "1"
+
+
+def _status_only(resp):
+    """Judge a response by its status code alone (0 means no response)"""
+    return 0 < resp.status_code < 400
 
-class FraudDetectionUser(HttpUser):
+
+def _send(client, method, url, **kwargs):
+    """Issue a task request, reading the body only when not in fast mode"""
+    if not FAST_MODE:
+        return client.request(method, url, **kwargs)
+
+    with client.request(method, url, stream=True, catch_response=True, **kwargs) as resp:
+        if not _status_only(resp):
+            resp.failure(f"HTTP {resp.status_code}")
+            return
+
+        # Drain the raw bytes so the keep-alive connection goes back to the pool
+        while resp.stream.read(65536):
+            pass
+        resp.success()
+
+# Stress-test bodies are serialized once; the hot task only picks one
+_STRESS_BODIES = [
+    json.dumps({
+        "time": random.uniform(0, 200000),
+        "amount": random.uniform(1, 1000),
+        **_sample_features(_LEGIT_POOL)
+    }).encode()
+    for _ in range(1024)
+]
+
+
+class PooledHttpUser(FastHttpUser):
+    """Shared connection settings for the API users below"""
+
+    abstract = True  # not spawned itself
+    network_timeout = 10.0
+    connection_timeout = 10.0
+    concurrency = 50  # keep-alive connections per user, so nothing is discarded
+
+
+class FraudDetectionUser(PooledHttpUser):
     """Simulates a user interacting with the Fraud Detection API"""
 
     wait_time = between(1, 3)  # Wait 1-3 seconds between tasks
@@ -30,7 +113,7 @@ class FraudDetectionUser(HttpUser):
             }
         )
         if response.status_code == 200:
-            self.token = response.json().get("access_token")
+            self.token = json.loads(response.content).get("access_token")
         else:
             print(f"Login failed: {response.status_code}")
 
@@ -44,14 +127,14 @@ class FraudDetectionUser(HttpUser):
     @task(10)
     def health_check(self):
         """Check API health - most common request"""
-        self.client.get("/api/v1/health")
+        _send(self.client, "GET", "/api/v1/health")
 
     @task(5)
     def single_prediction(self):
         """Make a single fraud prediction"""
         transaction = self._generate_transaction()
-        self.client.post(
-            "/api/v1/predict",
+        _send(
+            self.client, "POST", "/api/v1/predict",
             json=transaction,
             headers=self.headers
         )
@@ -60,8 +143,8 @@ class FraudDetectionUser(HttpUser):
     def batch_prediction(self):
         """Make batch predictions"""
         transactions = [self._generate_transaction() for _ in range(10)]
-        self.client.post(
-            "/api/v1/predict/batch",
+        _send(
+            self.client, "POST", "/api/v1/predict/batch",
             json={"transactions": transactions},
             headers=self.headers
         )
@@ -69,60 +152,60 @@ class FraudDetectionUser(HttpUser):
     @task(3)
     def get_prediction_history(self):
         """Get prediction history"""
-        self.client.get(
-            "/api/v1/predict/history?limit=50",
+        _send(
+            self.client, "GET", "/api/v1/predict/history?limit=50",
             headers=self.headers
         )
 
     @task(3)
     def get_prediction_stats(self):
         """Get user prediction stats"""
-        self.client.get(
-            "/api/v1/predict/stats",
+        _send(
+            self.client, "GET", "/api/v1/predict/stats",
             headers=self.headers
         )
 
     @task(2)
     def get_analytics_stats(self):
         """Get analytics stats"""
-        self.client.get(
-            "/api/v1/analytics/stats",
+        _send(
+            self.client, "GET", "/api/v1/analytics/stats",
             headers=self.headers
         )
 
     @task(2)
     def get_time_series(self):
         """Get time series data"""
-        self.client.get(
-            "/api/v1/analytics/time-series?period=day&days=30",
+        _send(
+            self.client, "GET", "/api/v1/analytics/time-series?period=day&days=30",
             headers=self.headers
         )
 
     @task(1)
     def get_model_info(self):
         """Get model information"""
-        self.client.get(
-            "/api/v1/analytics/model",
+        _send(
+            self.client, "GET", "/api/v1/analytics/model",
             headers=self.headers
         )
 
     @task(1)
     def get_feature_importance(self):
         """Get feature importance"""
-        self.client.get(
-            "/api/v1/analytics/features",
+        _send(
+            self.client, "GET", "/api/v1/analytics/features",
             headers=self.headers
         )
 
     @task(1)
     def get_sample_legitimate(self):
         """Get sample legitimate transaction"""
-        self.client.get("/api/v1/predict/sample/legitimate")
+        _send(self.client, "GET", "/api/v1/predict/sample/legitimate")
 
     @task(1)
     def get_sample_fraud(self):
         """Get sample fraud transaction"""
-        self.client.get("/api/v1/predict/sample/fraud")
+        _send(self.client, "GET", "/api/v1/predict/sample/fraud")
 
     def _generate_transaction(self):
         """Generate a random transaction for testing"""
@@ -133,17 +216,17 @@ class FraudDetectionUser(HttpUser):
             return {
                 "time": random.uniform(100000, 200000),
                 "amount": random.uniform(500, 5000),
-                **{f"v{i}": random.gauss(-2, 2) for i in range(1, 29)}
+                **_sample_features(_FRAUD_POOL)
             }
         else:
             return {
                 "time": random.uniform(0, 200000),
                 "amount": random.uniform(1, 500),
-                **{f"v{i}": random.gauss(0, 1) for i in range(1, 29)}
+                **_sample_features(_LEGIT_POOL)
             }
 
 
-class AdminUser(HttpUser):
+class AdminUser(PooledHttpUser):
     """Simulates an admin user - less frequent"""
 
     wait_time = between(5, 10)
@@ -160,7 +243,7 @@ class AdminUser(HttpUser):
             }
         )
         if response.status_code == 200:
-            self.token = response.json().get("access_token")
+            self.token = json.loads(response.content).get("access_token")
 
     @property
     def headers(self):
@@ -171,39 +254,39 @@ class AdminUser(HttpUser):
     @task(3)
     def get_system_stats(self):
         """Get system statistics (admin)"""
-        self.client.get(
-            "/api/v1/admin/stats",
+        _send(
+            self.client, "GET", "/api/v1/admin/stats",
             headers=self.headers
         )
 
     @task(2)
     def get_users(self):
         """Get users list (admin)"""
-        self.client.get(
-            "/api/v1/admin/users",
+        _send(
+            self.client, "GET", "/api/v1/admin/users",
             headers=self.headers
         )
 
     @task(1)
     def get_audit_logs(self):
         """Get audit logs (admin)"""
-        self.client.get(
-            "/api/v1/admin/audit-logs",
+        _send(
+            self.client, "GET", "/api/v1/admin/audit-logs",
             headers=self.headers
         )
 
     @task(2)
     def detailed_health(self):
         """Get detailed health status"""
-        self.client.get("/api/v1/health/detailed")
+        _send(self.client, "GET", "/api/v1/health/detailed")
 
     @task(1)
     def get_metrics(self):
         """Get Prometheus metrics"""
-        self.client.get("/api/v1/metrics")
+        _send(self.client, "GET", "/api/v1/metrics")
 
 
-class APIStressTest(HttpUser):
+class APIStressTest(PooledHttpUser):
     """High-frequency stress test user"""
 
     wait_time = between(0.1, 0.5)  # Very fast
@@ -216,7 +299,9 @@ class APIStressTest(HttpUser):
             json={"username": "Nostradam", "password": "test123456"}
         )
         if response.status_code == 200:
-            self.token = response.json().get("access_token")
+            self.token = json.loads(response.content).get("access_token")
+
+        self.json_headers = {**self.headers, "Content-Type": "application/json"}
 
     @property
     def headers(self):
@@ -227,15 +312,10 @@ class APIStressTest(HttpUser):
     @task
     def rapid_predictions(self):
         """Rapid fire predictions to stress test"""
-        transaction = {
-            "time": random.uniform(0, 200000),
-            "amount": random.uniform(1, 1000),
-            **{f"v{i}": random.gauss(0, 1) for i in range(1, 29)}
-        }
-        self.client.post(
-            "/api/v1/predict",
-            json=transaction,
-            headers=self.headers
+        _send(
+            self.client, "POST", "/api/v1/predict",
+            data=random.choice(_STRESS_BODIES),
+            headers=self.json_headers
         )
 
 
@@ -0,0 +1,35 @@
+"""
+Load shapes for the Fraud Detection API load tests
+
+Kept out of locustfile.py because Locust applies any LoadTestShape it finds,
+which would override -u/-r for ordinary runs. Opt in by listing this file:
+
+    locust -f locustfile.py,shapes.py --host=http://localhost:8000 --headless
+"""
+
+from locust import LoadTestShape
+
+
+class GradualLoadShape(LoadTestShape):
+    """
+    Staged ramp up to 3000 users
+
+    Steps up in plateaus instead of spawning everyone at once, so the API
+    (and its connection pools) see a ramp rather than a connection storm.
+    """
+
+    # (end of stage in seconds since start, users, spawn rate per second)
+    stages = [
+        (60, 500, 50),
+        (180, 1500, 50),
+        (360, 3000, 50),
+    ]
+
+    def tick(self):
+        run_time = self.get_run_time()
+
+        for end, users, spawn_rate in self.stages:
+            if run_time < end:
+                return users, spawn_rate
+
+        return None
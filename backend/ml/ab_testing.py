@@ -6,22 +6,125 @@ Author: Zhmuryk Andrii
 Copyright (c) 2024 - All Rights Reserved
 """
 
+import bisect
 import hashlib
+import itertools
 import logging
 import json
+import math
+import time
 from datetime import datetime
-from typing import Dict, List, Optional, Any, Tuple
-from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Any, Set, Tuple
+from dataclasses import dataclass
 from enum import Enum
 import random
 
 import numpy as np
-from scipy import stats
+import xxhash
+
+# orjson is optional; fall back to the stdlib encoder
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Optional: Numba JIT for the many-variant significance kernel
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# User bucketing schemes. An experiment keeps the scheme it was created
+# with, so assignments never reshuffle when the default changes.
+HASH_VERSION_MD5 = 1
+HASH_VERSION_XXH64 = 2
+DEFAULT_HASH_VERSION = HASH_VERSION_XXH64
+
+
+def _hash_bucket(key: str, version: int = DEFAULT_HASH_VERSION) -> int:
+    """
+    Map a key to a stable bucket in [0, 100)
+
+    Args:
+        key: String to bucket
+        version: HASH_VERSION_XXH64 (fast, non-cryptographic) or
+            HASH_VERSION_MD5 for experiments created before it
+
+    Returns:
+        Bucket number
+    """
+    if version == HASH_VERSION_MD5:
+        return int(hashlib.md5(key.encode()).hexdigest(), 16) % 100
+    return xxhash.xxh64_intdigest(key) % 100
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _two_proportion_z(n1: float, p1: float, ns: np.ndarray, ps: np.ndarray) -> tuple:
+        """z statistics and two-sided p-values of each treatment vs control"""
+        k = ns.size
+        z_stats = np.zeros(k)
+        p_values = np.ones(k)
+        if n1 <= 0:
+            return z_stats, p_values
+        for i in range(k):
+            n2 = ns[i]
+            if n2 <= 0:
+                continue
+            pooled_p = (p1 * n1 + ps[i] * n2) / (n1 + n2)
+            se = math.sqrt(pooled_p * (1 - pooled_p) * (1 / n1 + 1 / n2))
+            if se > 0:
+                z_stats[i] = (ps[i] - p1) / se
+            p_values[i] = math.erfc(abs(z_stats[i]) / math.sqrt(2.0))
+        return z_stats, p_values
+else:
+    def _two_proportion_z(n1: float, p1: float, ns: np.ndarray, ps: np.ndarray) -> tuple:
+        """z statistics and two-sided p-values of each treatment vs control"""
+        # Imported here so routing and recording never pay for loading SciPy
+        from scipy.special import ndtr
+
+        testable = (ns > 0) & (n1 > 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pooled_p = (p1 * n1 + ps * ns) / (n1 + ns)
+            se = np.sqrt(pooled_p * (1 - pooled_p) * (1 / n1 + 1 / ns))
+            z_stats = np.where(testable & (se > 0), (ps - p1) / se, 0.0)
+        p_values = np.where(testable, 2 * (1 - ndtr(np.abs(z_stats))), 1.0)
+        return z_stats, p_values
+
+
+def _json_default(obj: Any) -> Any:
+    """Encode NumPy scalars/arrays and anything else the stdlib can't"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    return str(obj)
+
+
+def dumps_report(report: Dict) -> bytes:
+    """Serialize an experiment dict or report to UTF-8 JSON bytes"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(report, default=str, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(report, default=_json_default, separators=(",", ":")).encode("utf-8")
+
+
+# Per-arm sample floor before the sequential test trusts its normal approximation
+SPRT_MIN_SAMPLES = 100
+
+
+# Columns of ABTestExperiment._counters, one row per variant
+COL_PRED, COL_FRAUD, COL_CORRECT, COL_FP, COL_FN = range(5)
+_COUNTER_FIELDS = (
+    'predictions', 'fraud_detected', 'correct_predictions', 'false_positives', 'false_negatives'
+)
+
+
 class ExperimentStatus(Enum):
     """Status of an A/B experiment"""
     DRAFT = "draft"
@@ -33,7 +136,12 @@ class ExperimentStatus(Enum):
 
 @dataclass
 class ModelVariant:
-    """A model variant in an A/B test"""
+    """
+    A model variant in an A/B test
+
+    Once the variant belongs to an experiment, the experiment owns the live
+    counts; the counter fields here are a snapshot refreshed by to_dict().
+    """
     name: str
     model_path: str
     traffic_percentage: float
@@ -51,6 +159,23 @@ class ModelVariant:
             self.metadata = {}
 
 
+def _variant_to_dict(variant: ModelVariant) -> Dict[str, Any]:
+    """Plain-dict form of a variant, without asdict()'s recursive deep copy"""
+    return {
+        'name': variant.name,
+        'model_path': variant.model_path,
+        'traffic_percentage': variant.traffic_percentage,
+        'is_control': variant.is_control,
+        'predictions': variant.predictions,
+        'correct_predictions': variant.correct_predictions,
+        'fraud_detected': variant.fraud_detected,
+        'false_positives': variant.false_positives,
+        'false_negatives': variant.false_negatives,
+        'total_response_time_ms': variant.total_response_time_ms,
+        'metadata': dict(variant.metadata)
+    }
+
+
 @dataclass
 class ExperimentResult:
     """Result of an A/B experiment"""
@@ -71,7 +196,10 @@ class ABTestExperiment:
         description: str = "",
         variants: List[ModelVariant] = None,
         min_samples: int = 1000,
-        confidence_level: float = 0.95
+        confidence_level: float = 0.95,
+        min_detectable_effect: float = 0.01,
+        power: float = 0.8,
+        hash_version: int = DEFAULT_HASH_VERSION
     ):
         """
         Initialize an A/B test experiment
@@ -83,6 +211,11 @@ class ABTestExperiment:
             variants: List of model variants to test
             min_samples: Minimum samples per variant before analysis
             confidence_level: Required confidence level for statistical significance
+            min_detectable_effect: Fraud-rate difference the sequential test looks for
+            power: Power of the sequential test at min_detectable_effect
+            hash_version: User bucketing scheme (HASH_VERSION_*). Pass the
+                stored value when recreating an existing experiment, and
+                HASH_VERSION_MD5 for one created before xxh64 bucketing.
         """
         self.experiment_id = experiment_id
         self.name = name
@@ -90,21 +223,78 @@ class ABTestExperiment:
         self.variants = variants or []
         self.min_samples = min_samples
         self.confidence_level = confidence_level
+        self.min_detectable_effect = min_detectable_effect
+        self.power = power
+        self.hash_version = hash_version
 
         self.status = ExperimentStatus.DRAFT
         self.created_at = datetime.now()
         self.started_at: Optional[datetime] = None
         self.completed_at: Optional[datetime] = None
 
+        # Monotonic clock readings for durations; the datetimes above are
+        # only for display and serialization
+        self._started_ns: Optional[int] = None
+        self._completed_ns: Optional[int] = None
+
+        # Derived metrics per variant, recomputed only after new predictions
+        self._metrics_cache: Dict[str, Dict[str, float]] = {}
+        self._dirty: Set[str] = set()
+
+        # Prediction counters, one row per variant (columns COL_*)
+        self._idx: Dict[str, int] = {}
+        self._counters = np.zeros((0, len(_COUNTER_FIELDS)), dtype=np.int64)
+        self._resp = np.zeros(0, dtype=np.float64)
+
         self._validate_traffic_split()
 
     def _validate_traffic_split(self):
-        """Validate that traffic percentages sum to 100%"""
+        """Validate that traffic percentages sum to 100% and rebuild routing"""
         if self.variants:
             total = sum(v.traffic_percentage for v in self.variants)
             if abs(total - 100.0) > 0.01:
                 raise ValueError(f"Traffic percentages must sum to 100%, got {total}")
 
+        # Cumulative traffic boundaries for bisect routing in get_variant_for_user
+        self._cum = list(itertools.accumulate(v.traffic_percentage for v in self.variants))
+        self._variants_tuple = tuple(self.variants)
+        self._by_name = {v.name: v for v in self.variants}
+        self._control = next(
+            (v for v in self.variants if v.is_control),
+            self.variants[0] if self.variants else None
+        )
+        self._build_counters()
+
+    def _build_counters(self):
+        """Rebuild the counter matrix, keeping counts recorded so far"""
+        self._sync_variants()
+        self._idx = {v.name: i for i, v in enumerate(self.variants)}
+        self._counters = np.array(
+            [[getattr(v, f) for f in _COUNTER_FIELDS] for v in self.variants],
+            dtype=np.int64
+        ).reshape(len(self.variants), len(_COUNTER_FIELDS))
+        self._resp = np.array([v.total_response_time_ms for v in self.variants], dtype=np.float64)
+
+    def _sync_variants(self):
+        """Copy the live counters back onto the ModelVariant objects"""
+        for variant in self.variants:
+            i = self._idx.get(variant.name)
+            if i is None:
+                continue
+            for field, value in zip(_COUNTER_FIELDS, self._counters[i].tolist()):
+                setattr(variant, field, value)
+            variant.total_response_time_ms = float(self._resp[i])
+
+    @property
+    def status(self) -> ExperimentStatus:
+        """Current experiment status"""
+        return self._status
+
+    @status.setter
+    def status(self, value: ExperimentStatus):
+        self._status = value
+        self._running = value == ExperimentStatus.RUNNING
+
     def add_variant(self, variant: ModelVariant):
         """Add a variant to the experiment"""
         self.variants.append(variant)
@@ -119,6 +309,8 @@ class ABTestExperiment:
 
         self.status = ExperimentStatus.RUNNING
         self.started_at = datetime.now()
+        self._started_ns = time.monotonic_ns()
+        self._completed_ns = None
         logger.info(f"Experiment '{self.name}' started")
 
     def pause(self):
@@ -137,33 +329,37 @@ class ABTestExperiment:
         """Complete the experiment"""
         self.status = ExperimentStatus.COMPLETED
         self.completed_at = datetime.now()
+        self._completed_ns = time.monotonic_ns()
         self.result = result
         logger.info(f"Experiment '{self.name}' completed. Winner: {result.winner}")
 
+    def elapsed_seconds(self) -> float:
+        """Seconds since start, up to completion if the experiment is completed"""
+        if self._started_ns is None:
+            return 0.0
+        end_ns = self._completed_ns if self._completed_ns is not None else time.monotonic_ns()
+        return (end_ns - self._started_ns) / 1e9
+
     def get_variant_for_user(self, user_id: str) -> ModelVariant:
         """
         Get the assigned variant for a user (deterministic)
 
         Uses consistent hashing to ensure users always get the same variant
         """
-        if self.status != ExperimentStatus.RUNNING:
+        if not self._running:
             # Return control variant if experiment not running
-            control = next((v for v in self.variants if v.is_control), self.variants[0])
-            return control
+            return self._control
 
         # Consistent hashing based on user_id and experiment_id
-        hash_input = f"{user_id}:{self.experiment_id}"
-        hash_value = int(hashlib.md5(hash_input.encode()).hexdigest(), 16)
-        bucket = hash_value % 100
+        bucket = _hash_bucket(f"{user_id}:{self.experiment_id}", self.hash_version)
 
         # Assign variant based on traffic percentages
-        cumulative = 0
-        for variant in self.variants:
-            cumulative += variant.traffic_percentage
-            if bucket < cumulative:
-                return variant
+        idx = bisect.bisect_right(self._cum, bucket)
+        return self._variants_tuple[min(idx, len(self._variants_tuple) - 1)]
 
-        return self.variants[-1]
+    def get_variant(self, variant_name: str) -> Optional[ModelVariant]:
+        """Look up a variant by name"""
+        return self._by_name.get(variant_name)
 
     def record_prediction(
         self,
@@ -173,63 +369,186 @@ class ABTestExperiment:
         response_time_ms: float = 0.0
     ):
         """Record a prediction result for a variant"""
-        variant = next((v for v in self.variants if v.name == variant_name), None)
-        if not variant:
+        i = self._idx.get(variant_name)
+        if i is None:
             logger.warning(f"Unknown variant: {variant_name}")
             return
 
-        variant.predictions += 1
-        variant.total_response_time_ms += response_time_ms
+        row = self._counters[i]
+        row[COL_PRED] += 1
+        self._resp[i] += response_time_ms
+        self._dirty.add(variant_name)
 
         if is_fraud_predicted:
-            variant.fraud_detected += 1
+            row[COL_FRAUD] += 1
 
         if is_fraud_actual is not None:
             if is_fraud_predicted == is_fraud_actual:
-                variant.correct_predictions += 1
+                row[COL_CORRECT] += 1
             elif is_fraud_predicted and not is_fraud_actual:
-                variant.false_positives += 1
+                row[COL_FP] += 1
             elif not is_fraud_predicted and is_fraud_actual:
-                variant.false_negatives += 1
+                row[COL_FN] += 1
+
+    def record_prediction_batch(
+        self,
+        variant_name: str,
+        preds: np.ndarray,
+        actuals: Optional[np.ndarray] = None,
+        rtimes: Optional[np.ndarray] = None
+    ):
+        """
+        Record many prediction results for a variant in one pass
+
+        Args:
+            variant_name: Variant the predictions were served by
+            preds: Predicted fraud flags (bool or 0/1)
+            actuals: Ground truth as 0/1 floats, NaN where unknown
+            rtimes: Response times in milliseconds
+        """
+        i = self._idx.get(variant_name)
+        if i is None:
+            logger.warning(f"Unknown variant: {variant_name}")
+            return
+
+        preds = np.asarray(preds, dtype=bool)
+        if preds.size == 0:
+            return
+
+        row = self._counters[i]
+        row[COL_PRED] += preds.size
+        row[COL_FRAUD] += int(np.count_nonzero(preds))
+        if rtimes is not None:
+            self._resp[i] += float(np.sum(rtimes))
+        self._dirty.add(variant_name)
+
+        if actuals is not None:
+            actuals = np.asarray(actuals, dtype=np.float64)
+            labeled = ~np.isnan(actuals)
+            truth = actuals == 1.0
+            row[COL_CORRECT] += int(np.count_nonzero(labeled & (preds == truth)))
+            row[COL_FP] += int(np.count_nonzero(labeled & preds & ~truth))
+            row[COL_FN] += int(np.count_nonzero(labeled & ~preds & truth))
 
     def get_variant_metrics(self, variant: ModelVariant) -> Dict[str, float]:
-        """Calculate metrics for a variant"""
-        if variant.predictions == 0:
+        """
+        Get metrics for a variant
+
+        Cached until record_prediction touches the variant again; the returned
+        dict is shared, so treat it as read-only.
+        """
+        i = self._idx.get(variant.name)
+        if i is None:
+            # Not part of this experiment; fall back to the variant's own fields
+            return self._compute_variant_metrics(
+                *(getattr(variant, f) for f in _COUNTER_FIELDS), variant.total_response_time_ms
+            )
+
+        cached = self._metrics_cache.get(variant.name)
+        if cached is not None and variant.name not in self._dirty:
+            return cached
+
+        metrics = self._compute_variant_metrics(*self._counters[i].tolist(), float(self._resp[i]))
+        self._metrics_cache[variant.name] = metrics
+        self._dirty.discard(variant.name)
+        return metrics
+
+    @staticmethod
+    def _compute_variant_metrics(
+        predictions: int,
+        fraud_detected: int,
+        correct_predictions: int,
+        false_positives: int,
+        false_negatives: int,
+        total_response_time_ms: float
+    ) -> Dict[str, float]:
+        """Calculate metrics from one variant's counters"""
+        if predictions == 0:
             return {}
 
         metrics = {
-            'predictions': variant.predictions,
-            'fraud_detected': variant.fraud_detected,
-            'fraud_rate': variant.fraud_detected / variant.predictions,
-            'avg_response_time_ms': variant.total_response_time_ms / variant.predictions
+            'predictions': predictions,
+            'fraud_detected': fraud_detected,
+            'fraud_rate': fraud_detected / predictions,
+            'avg_response_time_ms': total_response_time_ms / predictions
         }
 
-        # Add accuracy metrics if we have ground truth
-        total_labeled = variant.correct_predictions + variant.false_positives + variant.false_negatives
+        # Accuracy metrics from ground truth; each is reported only when its
+        # denominator is non-zero, so a genuine 0.0 is kept
+        total_labeled = correct_predictions + false_positives + false_negatives
         if total_labeled > 0:
-            metrics['accuracy'] = variant.correct_predictions / total_labeled
+            metrics['accuracy'] = correct_predictions / total_labeled
 
-            # Precision and recall
-            if variant.fraud_detected > 0:
-                metrics['precision'] = (variant.fraud_detected - variant.false_positives) / variant.fraud_detected
-            if (variant.fraud_detected - variant.false_positives + variant.false_negatives) > 0:
-                tp = variant.fraud_detected - variant.false_positives
-                metrics['recall'] = tp / (tp + variant.false_negatives)
+            tp = fraud_detected - false_positives
+            if fraud_detected > 0:
+                metrics['precision'] = tp / fraud_detected
+            if tp + false_negatives > 0:
+                metrics['recall'] = tp / (tp + false_negatives)
 
             if metrics.get('precision') and metrics.get('recall'):
                 p, r = metrics['precision'], metrics['recall']
-                metrics['f1_score'] = 2 * (p * r) / (p + r) if (p + r) > 0 else 0
+                metrics['f1_score'] = 2 * p * r / (p + r)
 
         return metrics
 
+    def sequential_decisions(self) -> Dict[str, str]:
+        """
+        Wald SPRT on each treatment's fraud rate vs control
+
+        Tests H0 "no difference" against H1 "|difference| = min_detectable_effect"
+        with error rates alpha = 1 - confidence_level and beta = 1 - power, so a
+        clearly better or clearly equivalent variant can be called well before
+        min_samples is reached.
+
+        Returns:
+            Mapping of treatment name to 'significant', 'no_difference' or 'continue'
+        """
+        control = self._control
+        treatments = [v for v in self.variants if v is not control]
+        if control is None or not treatments:
+            return {}
+
+        alpha, beta = 1 - self.confidence_level, 1 - self.power
+        upper = math.log((1 - beta) / alpha)
+        lower = math.log(beta / (1 - alpha))
+        delta = self.min_detectable_effect
+
+        c = self._counters[self._idx[control.name]]
+        rows = self._counters[[self._idx[v.name] for v in treatments]]
+        n1, f1 = float(c[COL_PRED]), float(c[COL_FRAUD])
+        ns, fs = rows[:, COL_PRED].astype(float), rows[:, COL_FRAUD].astype(float)
+
+        ready = (ns >= SPRT_MIN_SAMPLES) & (n1 >= SPRT_MIN_SAMPLES)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            diff = np.abs(fs / ns - f1 / n1)
+            pooled_p = (f1 + fs) / (n1 + ns)
+            var = pooled_p * (1 - pooled_p) * (1 / n1 + 1 / ns)
+            # Log-likelihood ratio of the two-sided alternative (an even mix of
+            # +delta and -delta) against no difference: -d^2/2v + log cosh(x*d/v)
+            x = diff * delta / var
+            log_cosh = x + np.log1p(np.exp(-2 * x)) - math.log(2.0)
+            llr = np.where(ready & (var > 0), log_cosh - delta * delta / (2 * var), 0.0)
+
+        decisions = np.where(
+            ready & (llr >= upper), 'significant',
+            np.where(ready & (llr <= lower), 'no_difference', 'continue')
+        )
+        return {v.name: str(d) for v, d in zip(treatments, decisions)}
+
+    def should_stop(self) -> bool:
+        """True once the sequential test has decided every treatment"""
+        decisions = self.sequential_decisions()
+        return bool(decisions) and 'continue' not in decisions.values()
+
     def analyze_results(self) -> ExperimentResult:
         """Analyze experiment results and determine winner"""
         logger.info(f"Analyzing results for experiment '{self.name}'")
 
         # Check minimum samples
-        for variant in self.variants:
-            if variant.predictions < self.min_samples:
-                logger.warning(f"Variant {variant.name} has only {variant.predictions} samples")
+        predictions = self._counters[:, COL_PRED].tolist()
+        for variant, n in zip(self.variants, predictions):
+            if n < self.min_samples:
+                logger.warning(f"Variant {variant.name} has only {n} samples")
 
         # Get metrics for all variants
         metrics_by_variant = {}
@@ -237,7 +556,7 @@ class ABTestExperiment:
             metrics_by_variant[variant.name] = self.get_variant_metrics(variant)
 
         # Find control variant
-        control = next((v for v in self.variants if v.is_control), self.variants[0])
+        control = self._control
         control_metrics = metrics_by_variant[control.name]
 
         # Compare each treatment to control
@@ -245,31 +564,23 @@ class ABTestExperiment:
         best_variant = control
         best_improvement = 0
 
-        for variant in self.variants:
-            if variant.name == control.name:
-                continue
-
-            variant_metrics = metrics_by_variant[variant.name]
-
-            # Statistical test on fraud detection rates
-            control_fraud_rate = control_metrics.get('fraud_rate', 0)
-            variant_fraud_rate = variant_metrics.get('fraud_rate', 0)
+        treatments = [v for v in self.variants if v.name != control.name]
+        control_fraud_rate = control_metrics.get('fraud_rate', 0)
 
-            # Two-proportion z-test
-            n1, n2 = control.predictions, variant.predictions
-            p1, p2 = control_fraud_rate, variant_fraud_rate
-
-            if n1 > 0 and n2 > 0:
-                pooled_p = (p1 * n1 + p2 * n2) / (n1 + n2)
-                se = np.sqrt(pooled_p * (1 - pooled_p) * (1/n1 + 1/n2))
-                z_stat = (p2 - p1) / se if se > 0 else 0
-                p_value = 2 * (1 - stats.norm.cdf(abs(z_stat)))
+        # Two-proportion z-test on fraud detection rates, all treatments at once
+        n1, p1 = float(self._counters[self._idx[control.name], COL_PRED]), float(control_fraud_rate)
+        ns = self._counters[[self._idx[v.name] for v in treatments], COL_PRED].astype(float)
+        ps = np.array(
+            [metrics_by_variant[v.name].get('fraud_rate', 0) for v in treatments],
+            dtype=float
+        )
+        z_stats, p_values = _two_proportion_z(n1, p1, ns, ps)
+        significant = (ns > 0) & (n1 > 0) & (p_values < (1 - self.confidence_level))
 
-                is_significant = p_value < (1 - self.confidence_level)
-            else:
-                z_stat = 0
-                p_value = 1.0
-                is_significant = False
+        for variant, variant_fraud_rate, z_stat, p_value, is_significant in zip(
+            treatments, ps.tolist(), z_stats.tolist(), p_values.tolist(), significant.tolist()
+        ):
+            variant_metrics = metrics_by_variant[variant.name]
 
             comparisons[variant.name] = {
                 'control_metrics': control_metrics,
@@ -319,19 +630,26 @@ class ABTestExperiment:
 
     def to_dict(self) -> Dict:
         """Convert experiment to dictionary"""
+        self._sync_variants()
         return {
             'experiment_id': self.experiment_id,
             'name': self.name,
             'description': self.description,
             'status': self.status.value,
-            'variants': [asdict(v) for v in self.variants],
+            'variants': [_variant_to_dict(v) for v in self.variants],
             'min_samples': self.min_samples,
             'confidence_level': self.confidence_level,
+            'hash_version': self.hash_version,
             'created_at': self.created_at.isoformat(),
             'started_at': self.started_at.isoformat() if self.started_at else None,
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'elapsed_seconds': round(self.elapsed_seconds(), 3)
         }
 
+    def to_json(self) -> bytes:
+        """Serialize the experiment to JSON bytes, ready for an HTTP response"""
+        return dumps_report(self.to_dict())
+
 
 class ABTestingService:
     """Service for managing A/B testing experiments"""
@@ -472,6 +790,10 @@ class ABTestingService:
 
         return report
 
+    def export_experiment_report_json(self, experiment_id: str) -> bytes:
+        """Export the detailed experiment report as JSON bytes"""
+        return dumps_report(self.export_experiment_report(experiment_id))
+
 
 # Global A/B testing service instance
 ab_testing_service = ABTestingService()
@@ -15,9 +15,74 @@ from enum import Enum
 import numpy as np
 from scipy import stats
 
+# Optional: Numba JIT for the PSI reduction
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Added to every PSI bin so empty bins don't divide by zero
+PSI_EPSILON = 1e-10
+
+# ks_2samp uses exact p-values up to this sample size, the asymptotic
+# Kolmogorov distribution above it
+KS_EXACT_MAX_N = 10000
+
+
+def _bin_counts(data: np.ndarray, lo: np.ndarray, hi: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """
+    Histogram every column of data over its own equal-width edges
+
+    Matches np.histogram per column (half-open bins, last bin closed) but
+    runs as one pass over the whole matrix.
+
+    Returns:
+        Counts of shape (n_features, n_bins)
+    """
+    n_features, n_bins = edges.shape[0], edges.shape[1] - 1
+    width = hi - lo
+    scale = np.divide(n_bins, width, out=np.zeros_like(width, dtype=float), where=width > 0)
+
+    idx = ((data - lo) * scale).astype(np.intp)
+    np.clip(idx, 0, n_bins - 1, out=idx)
+
+    # Fix values that float rounding put on the wrong side of an edge
+    cols = np.arange(n_features)
+    idx -= data < edges[cols, idx]
+    idx += (data >= edges[cols, idx + 1]) & (idx != n_bins - 1)
+
+    flat = (idx + cols * n_bins).ravel()
+    return np.bincount(flat, minlength=n_features * n_bins).reshape(n_features, n_bins)
+
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _psi_kernel(ref_counts: np.ndarray, curr_counts: np.ndarray, n_ref: int, n_curr: int) -> float:
+        """Mean PSI over features from (n_features, n_bins) count matrices"""
+        n_features, n_bins = ref_counts.shape
+        ref_total = n_ref + PSI_EPSILON * n_bins
+        curr_total = n_curr + PSI_EPSILON * n_bins
+        psi = np.empty(n_features)
+        for j in prange(n_features):
+            acc = 0.0
+            for b in range(n_bins):
+                ref_pct = (ref_counts[j, b] + PSI_EPSILON) / ref_total
+                curr_pct = (curr_counts[j, b] + PSI_EPSILON) / curr_total
+                acc += (curr_pct - ref_pct) * np.log(curr_pct / ref_pct)
+            psi[j] = acc
+        return psi.mean()
+else:
+    def _psi_kernel(ref_counts: np.ndarray, curr_counts: np.ndarray, n_ref: int, n_curr: int) -> float:
+        """Mean PSI over features from (n_features, n_bins) count matrices"""
+        n_bins = ref_counts.shape[1]
+        ref_pct = (ref_counts + PSI_EPSILON) / (n_ref + PSI_EPSILON * n_bins)
+        curr_pct = (curr_counts + PSI_EPSILON) / (n_curr + PSI_EPSILON * n_bins)
+        return np.mean(np.sum((curr_pct - ref_pct) * np.log(curr_pct / ref_pct), axis=1))
+
 
 class DriftSeverity(Enum):
     """Severity levels for drift detection"""
@@ -63,6 +128,11 @@ class DataDriftDetector:
         # Calculate reference statistics
         self.reference_stats = self._calculate_statistics(reference_data)
 
+        # Reference data never changes, so sort it (and its empirical CDF
+        # steps) once rather than on every KS test
+        self._ref_sorted = np.sort(reference_data, axis=0)
+        self._ref_cdf_steps = np.arange(1, len(reference_data) + 1) / len(reference_data)
+
     def _calculate_statistics(self, data: np.ndarray) -> Dict:
         """Calculate distribution statistics"""
         return {
@@ -98,6 +168,61 @@ class DataDriftDetector:
         statistic, p_value = stats.ks_2samp(ref, curr)
         return statistic, p_value
 
+    def kolmogorov_smirnov_features(
+        self,
+        current_data: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Perform the KS test on every feature in one vectorized call
+
+        Returns:
+            (statistics, p_values), one entry per feature
+        """
+        n_ref, n_curr = len(self.reference_data), len(current_data)
+        if max(n_ref, n_curr) > KS_EXACT_MAX_N:
+            # Same statistic and asymptotic p-value ks_2samp would give, without
+            # re-sorting the reference
+            statistics = self._ks_stat_vectorized(current_data)
+            m, n = sorted([float(n_ref), float(n_curr)], reverse=True)
+            p_values = np.clip(stats.kstwo.sf(statistics, np.round(m * n / (m + n))), 0, 1)
+            return statistics, p_values
+
+        try:
+            result = stats.ks_2samp(self.reference_data, current_data, axis=0)
+        except TypeError:
+            # SciPy without axis support for ks_2samp
+            pairs = [
+                stats.ks_2samp(self.reference_data[:, i], current_data[:, i])
+                for i in range(self.reference_data.shape[1])
+            ]
+            return np.array([p[0] for p in pairs]), np.array([p[1] for p in pairs])
+        return np.asarray(result.statistic), np.asarray(result.pvalue)
+
+    def _ks_stat_vectorized(self, current_data: np.ndarray) -> np.ndarray:
+        """
+        Two-sample KS statistic per feature against the pre-sorted reference
+
+        The largest CDF gap is found at sample points; within a run of tied
+        values only the last one carries the full step, so only those count.
+        """
+        n_ref, n_curr = len(self._ref_sorted), len(current_data)
+        curr_sorted = np.sort(current_data, axis=0)
+        curr_cdf_steps = np.arange(1, n_curr + 1) / n_curr
+
+        statistics = np.empty(self._ref_sorted.shape[1])
+        for j in range(statistics.size):
+            ref_j, curr_j = self._ref_sorted[:, j], curr_sorted[:, j]
+            ref_ends = np.r_[ref_j[1:] != ref_j[:-1], True]
+            curr_ends = np.r_[curr_j[1:] != curr_j[:-1], True]
+
+            gap_at_ref = self._ref_cdf_steps - np.searchsorted(curr_j, ref_j, side='right') / n_curr
+            gap_at_curr = np.searchsorted(ref_j, curr_j, side='right') / n_ref - curr_cdf_steps
+            statistics[j] = max(
+                np.abs(gap_at_ref[ref_ends]).max(),
+                np.abs(gap_at_curr[curr_ends]).max()
+            )
+        return statistics
+
     def population_stability_index(
         self,
         current_data: np.ndarray,
@@ -110,33 +235,20 @@ class DataDriftDetector:
         0.1 <= PSI < 0.2: Slight change
         PSI >= 0.2: Significant change
         """
-        psi_values = []
+        ref, curr = self.reference_data, current_data
 
-        for feature_idx in range(self.reference_data.shape[1]):
-            ref_feature = self.reference_data[:, feature_idx]
-            curr_feature = current_data[:, feature_idx]
+        # Equal-width bins per feature spanning both samples, as an
+        # (n_features, n_bins + 1) edge matrix
+        lo = np.minimum(self.reference_stats['min'], curr.min(axis=0))
+        hi = np.maximum(self.reference_stats['max'], curr.max(axis=0))
+        edges = np.linspace(lo, hi, n_bins + 1, axis=1)
 
-            # Create bins based on reference data
-            bins = np.linspace(
-                min(ref_feature.min(), curr_feature.min()),
-                max(ref_feature.max(), curr_feature.max()),
-                n_bins + 1
-            )
-
-            # Calculate bin frequencies
-            ref_counts, _ = np.histogram(ref_feature, bins=bins)
-            curr_counts, _ = np.histogram(curr_feature, bins=bins)
-
-            # Convert to percentages (add small epsilon to avoid division by zero)
-            epsilon = 1e-10
-            ref_pct = (ref_counts + epsilon) / (len(ref_feature) + epsilon * n_bins)
-            curr_pct = (curr_counts + epsilon) / (len(curr_feature) + epsilon * n_bins)
+        # Bin frequencies for all features at once
+        ref_counts = _bin_counts(ref, lo, hi, edges)
+        curr_counts = _bin_counts(curr, lo, hi, edges)
 
-            # Calculate PSI for this feature
-            psi = np.sum((curr_pct - ref_pct) * np.log(curr_pct / ref_pct))
-            psi_values.append(psi)
-
-        return np.mean(psi_values)
+        # PSI per feature on epsilon-smoothed percentages, averaged over features
+        return _psi_kernel(ref_counts, curr_counts, len(ref), len(curr))
 
     def detect_drift(self, current_data: np.ndarray) -> DriftResult:
         """
@@ -155,15 +267,16 @@ class DataDriftDetector:
         logger.info(f"PSI: {psi:.4f}")
 
         # KS test for each feature
-        ks_results = []
-        for i in range(self.reference_data.shape[1]):
-            stat, p_value = self.kolmogorov_smirnov_test(current_data, i)
-            ks_results.append({
+        statistics, p_values = self.kolmogorov_smirnov_features(current_data)
+        ks_results = [
+            {
                 'feature': i,
                 'statistic': stat,
                 'p_value': p_value,
                 'drift': stat > self.threshold_ks or p_value < 0.05
-            })
+            }
+            for i, (stat, p_value) in enumerate(zip(statistics.tolist(), p_values.tolist()))
+        ]
 
         # Count drifted features
         drifted_features = sum(1 for r in ks_results if r['drift'])
@@ -338,27 +451,50 @@ class ConceptDriftDetector:
         """
         self.window_size = window_size
         self.threshold = threshold
-        self.prediction_history: List[Dict] = []
+
+        # Ring buffer holding the last two windows, one array per field
+        self._capacity = window_size * 2
+        self._probs = np.zeros(self._capacity, dtype=np.float64)
+        self._pred = np.zeros(self._capacity, dtype=np.int8)
+        self._actual = np.zeros(self._capacity, dtype=np.int8)
+        self._has_actual = np.zeros(self._capacity, dtype=bool)
+        self._idx = 0  # next write position
+        self._count = 0  # entries held, up to capacity
 
     def add_prediction(
         self,
-        features: np.ndarray,
+        features: Optional[np.ndarray],
         prediction: int,
         probability: float,
         actual: Optional[int] = None
     ):
-        """Add a prediction to history"""
-        self.prediction_history.append({
-            'features': features,
-            'prediction': prediction,
-            'probability': probability,
-            'actual': actual,
-            'timestamp': datetime.now()
-        })
+        """
+        Add a prediction to history, overwriting the oldest once full
 
-        # Keep only recent history
-        if len(self.prediction_history) > self.window_size * 2:
-            self.prediction_history = self.prediction_history[-self.window_size * 2:]
+        Args:
+            features: Transaction features; accepted for API compatibility but
+                not stored, since drift is judged on outputs and labels only
+            prediction: Predicted class
+            probability: Predicted fraud probability
+            actual: True label, if known
+        """
+        i = self._idx
+        self._probs[i] = probability
+        self._pred[i] = prediction
+        self._has_actual[i] = actual is not None
+        self._actual[i] = actual if actual is not None else 0
+
+        self._idx = (i + 1) % self._capacity
+        self._count = min(self._count + 1, self._capacity)
+
+    def _error_rate(self, window: np.ndarray) -> float:
+        """Error rate over the labeled predictions at the given buffer positions"""
+        labeled = self._has_actual[window]
+        n_labeled = np.count_nonzero(labeled)
+        if n_labeled == 0:
+            return 0
+        errors = np.count_nonzero((self._pred[window] != self._actual[window]) & labeled)
+        return errors / n_labeled
 
     def detect_concept_drift(self) -> DriftResult:
         """
@@ -367,7 +503,7 @@ class ConceptDriftDetector:
         Returns:
             DriftResult with detection details
         """
-        if len(self.prediction_history) < self.window_size * 2:
+        if self._count < self._capacity:
             return DriftResult(
                 drift_detected=False,
                 severity=DriftSeverity.NONE,
@@ -377,22 +513,16 @@ class ConceptDriftDetector:
                 recommendations=[]
             )
 
-        # Split into old and new windows
-        old_window = self.prediction_history[:self.window_size]
-        new_window = self.prediction_history[-self.window_size:]
+        # Split into old and new windows; the oldest entry sits at the write position
+        old_window = (self._idx + np.arange(self.window_size)) % self._capacity
+        new_window = (old_window + self.window_size) % self._capacity
 
         # Compare prediction confidence distributions
-        old_probs = [p['probability'] for p in old_window]
-        new_probs = [p['probability'] for p in new_window]
-
-        ks_stat, p_value = stats.ks_2samp(old_probs, new_probs)
+        ks_stat, p_value = stats.ks_2samp(self._probs[old_window], self._probs[new_window])
 
         # Compare error rates if actual labels available
-        old_errors = [1 for p in old_window if p['actual'] is not None and p['prediction'] != p['actual']]
-        new_errors = [1 for p in new_window if p['actual'] is not None and p['prediction'] != p['actual']]
-
-        old_error_rate = len(old_errors) / len([p for p in old_window if p['actual'] is not None]) if any(p['actual'] is not None for p in old_window) else 0
-        new_error_rate = len(new_errors) / len([p for p in new_window if p['actual'] is not None]) if any(p['actual'] is not None for p in new_window) else 0
+        old_error_rate = self._error_rate(old_window)
+        new_error_rate = self._error_rate(new_window)
 
         error_rate_change = new_error_rate - old_error_rate
 
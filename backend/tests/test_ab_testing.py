@@ -0,0 +1,130 @@
+"""Tests for the A/B testing sequential stopping rule"""
+
+import hashlib
+
+import pytest
+
+from ml.ab_testing import (
+    COL_FRAUD,
+    COL_PRED,
+    DEFAULT_HASH_VERSION,
+    HASH_VERSION_MD5,
+    SPRT_MIN_SAMPLES,
+    ABTestExperiment,
+    ModelVariant,
+    _hash_bucket,
+)
+
+
+def make_experiment(treatments: int = 1, min_detectable_effect: float = 0.01) -> ABTestExperiment:
+    share = 100 / (treatments + 1)
+    variants = [ModelVariant("control", "control.pkl", share, is_control=True)]
+    variants += [
+        ModelVariant(f"treatment_{i}", f"treatment_{i}.pkl", share)
+        for i in range(treatments)
+    ]
+    return ABTestExperiment(
+        "exp", "Sequential test", variants=variants,
+        min_detectable_effect=min_detectable_effect
+    )
+
+
+def set_counts(experiment: ABTestExperiment, name: str, predictions: int, fraud: int):
+    row = experiment._idx[name]
+    experiment._counters[row, COL_PRED] = predictions
+    experiment._counters[row, COL_FRAUD] = fraud
+
+
+class TestSequentialDecisions:
+    """Test the SPRT decisions built from synthetic counters"""
+
+    def test_clear_difference_is_significant(self):
+        """Test a doubled fraud rate is called significant"""
+        experiment = make_experiment()
+        set_counts(experiment, "control", 2000, 100)
+        set_counts(experiment, "treatment_0", 2000, 200)
+
+        assert experiment.sequential_decisions() == {"treatment_0": "significant"}
+        assert experiment.should_stop() is True
+
+    def test_equal_rates_show_no_difference(self):
+        """Test identical rates over many samples accept the null"""
+        experiment = make_experiment()
+        set_counts(experiment, "control", 20000, 1000)
+        set_counts(experiment, "treatment_0", 20000, 1000)
+
+        assert experiment.sequential_decisions() == {"treatment_0": "no_difference"}
+        assert experiment.should_stop() is True
+
+    def test_inconclusive_evidence_continues(self):
+        """Test a small difference over few samples keeps the test running"""
+        experiment = make_experiment()
+        set_counts(experiment, "control", 1000, 50)
+        set_counts(experiment, "treatment_0", 1000, 52)
+
+        assert experiment.sequential_decisions() == {"treatment_0": "continue"}
+        assert experiment.should_stop() is False
+
+    @pytest.mark.parametrize("arm", ["control", "treatment_0"])
+    def test_min_samples_floor(self, arm):
+        """Test nothing is decided until both arms reach SPRT_MIN_SAMPLES"""
+        experiment = make_experiment(min_detectable_effect=0.2)
+        set_counts(experiment, "control", SPRT_MIN_SAMPLES, 0)
+        set_counts(experiment, "treatment_0", SPRT_MIN_SAMPLES, SPRT_MIN_SAMPLES // 2)
+        assert experiment.sequential_decisions() == {"treatment_0": "significant"}
+
+        short = SPRT_MIN_SAMPLES - 1
+        set_counts(experiment, arm, short, 0 if arm == "control" else short // 2)
+        assert experiment.sequential_decisions() == {"treatment_0": "continue"}
+
+    def test_should_stop_waits_for_every_treatment(self):
+        """Test one undecided treatment keeps the experiment running"""
+        experiment = make_experiment(treatments=2)
+        set_counts(experiment, "control", 2000, 100)
+        set_counts(experiment, "treatment_0", 2000, 200)
+        set_counts(experiment, "treatment_1", 50, 5)
+
+        assert experiment.sequential_decisions() == {
+            "treatment_0": "significant",
+            "treatment_1": "continue",
+        }
+        assert experiment.should_stop() is False
+
+    def test_no_treatments_never_stops(self):
+        """Test an experiment without treatments has nothing to decide"""
+        experiment = ABTestExperiment(
+            "exp", "Control only",
+            variants=[ModelVariant("control", "control.pkl", 100.0, is_control=True)]
+        )
+        assert experiment.sequential_decisions() == {}
+        assert experiment.should_stop() is False
+
+
+class TestVariantAssignment:
+    """Test user bucketing stays fixed per experiment"""
+
+    def test_md5_version_matches_legacy_bucketing(self):
+        """Test experiments on the MD5 scheme keep their original buckets"""
+        for user_id in ("1", "42", "user-7"):
+            key = f"{user_id}:exp"
+            legacy = int(hashlib.md5(key.encode()).hexdigest(), 16) % 100
+            assert _hash_bucket(key, HASH_VERSION_MD5) == legacy
+
+    def test_assignment_uses_the_experiment_hash_version(self):
+        """Test the bucketing scheme comes from the experiment, not the default"""
+        variants = [
+            ModelVariant("control", "control.pkl", 50.0, is_control=True),
+            ModelVariant("treatment", "treatment.pkl", 50.0),
+        ]
+        experiment = ABTestExperiment(
+            "exp", "Legacy", variants=variants, hash_version=HASH_VERSION_MD5
+        )
+        experiment.start()
+
+        for user_id in map(str, range(50)):
+            bucket = _hash_bucket(f"{user_id}:exp", HASH_VERSION_MD5)
+            expected = "control" if bucket < 50 else "treatment"
+            assert experiment.get_variant_for_user(user_id).name == expected
+
+        assert experiment.to_dict()["hash_version"] == HASH_VERSION_MD5
+        assert ABTestExperiment("new", "New").hash_version == DEFAULT_HASH_VERSION
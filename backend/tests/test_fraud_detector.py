@@ -0,0 +1,135 @@
+"""Tests for prediction caching and micro-batching"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.services import fraud_detector
+from app.services.fraud_detector import PredictionBatcher, PredictionCache
+
+
+class FakeModel:
+    """Stands in for fraud_model; echoes the first feature as the probability"""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.batch_sizes = []
+
+    def predict_batch_arrays(self, batch: np.ndarray):
+        self.batch_sizes.append(len(batch))
+        if self.fail:
+            raise RuntimeError("model unavailable")
+        probs = batch[:, 0].astype(np.float64)
+        return probs >= 0.5, probs
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    model = FakeModel()
+    monkeypatch.setattr(fraud_detector, "fraud_model", model)
+    return model
+
+
+class TestPredictionCache:
+    """Tests for the in-process prediction LRU"""
+
+    def test_get_returns_stored_prediction(self):
+        """Test a cached prediction round-trips"""
+        cache = PredictionCache(max_size=10, ttl_seconds=60)
+        cache.set("a", True, 0.9)
+        assert cache.get("a") == (True, 0.9)
+        assert cache.get("missing") is None
+
+    def test_entry_expires_after_ttl(self, monkeypatch):
+        """Test entries are dropped once their TTL has passed"""
+        now = [1000.0]
+        monkeypatch.setattr(fraud_detector.time, "monotonic", lambda: now[0])
+
+        cache = PredictionCache(max_size=10, ttl_seconds=60)
+        cache.set("a", False, 0.1)
+
+        now[0] += 59
+        assert cache.get("a") == (False, 0.1)
+        now[0] += 2
+        assert cache.get("a") is None
+        assert "a" not in cache._entries
+
+    def test_lru_evicts_least_recently_used(self):
+        """Test the oldest untouched entry is evicted past max_size"""
+        cache = PredictionCache(max_size=2, ttl_seconds=60)
+        cache.set("a", False, 0.1)
+        cache.set("b", False, 0.2)
+        cache.get("a")  # "b" is now least recently used
+        cache.set("c", True, 0.8)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == (False, 0.1)
+        assert cache.get("c") == (True, 0.8)
+
+    def test_disabled_cache_has_no_keys(self):
+        """Test a disabled cache never produces a key"""
+        cache = PredictionCache(enabled=False)
+        assert cache.key_for(np.zeros(30)) is None
+        assert cache.get(None) is None
+
+    @pytest.mark.asyncio
+    async def test_async_get_and_set(self):
+        """Test the event-loop variants share the local LRU"""
+        cache = PredictionCache(max_size=10, ttl_seconds=60)
+        cache.set_async("a", True, 0.7)
+        assert await cache.get_async("a") == (True, 0.7)
+        assert cache.get("a") == (True, 0.7)
+
+
+class TestPredictionBatcher:
+    """Tests for coalescing concurrent predictions"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_one_batch(self, fake_model):
+        """Test concurrent submits are predicted in one model call"""
+        batcher = PredictionBatcher(max_batch_size=8, batch_timeout_ms=200)
+        await batcher.start()
+        try:
+            rows = [np.full(30, i / 10) for i in range(8)]
+            results = await asyncio.gather(*(batcher.submit(r) for r in rows))
+        finally:
+            await batcher.stop()
+
+        assert fake_model.batch_sizes == [8]
+        # Each caller gets the result for its own row
+        for i, (is_fraud, prob) in enumerate(results):
+            assert prob == pytest.approx(i / 10)
+            assert is_fraud == (i / 10 >= 0.5)
+
+    @pytest.mark.asyncio
+    async def test_batches_are_capped_at_max_size(self, fake_model):
+        """Test a burst larger than max_batch_size is split"""
+        batcher = PredictionBatcher(max_batch_size=4, batch_timeout_ms=50)
+        await batcher.start()
+        try:
+            rows = [np.full(30, i / 10) for i in range(10)]
+            results = await asyncio.gather(*(batcher.submit(r) for r in rows))
+        finally:
+            await batcher.stop()
+
+        assert sum(fake_model.batch_sizes) == 10
+        assert max(fake_model.batch_sizes) <= 4
+        assert [prob for _, prob in results] == pytest.approx([i / 10 for i in range(10)])
+
+    @pytest.mark.asyncio
+    async def test_model_error_reaches_every_caller(self, fake_model):
+        """Test a failed batch fails each waiting request"""
+        fake_model.fail = True
+        batcher = PredictionBatcher(max_batch_size=4, batch_timeout_ms=50)
+        await batcher.start()
+        try:
+            results = await asyncio.gather(
+                *(batcher.submit(np.zeros(30)) for _ in range(3)),
+                return_exceptions=True
+            )
+        finally:
+            await batcher.stop()
+
+        assert len(results) == 3
+        assert all(isinstance(r, RuntimeError) for r in results)
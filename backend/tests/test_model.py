@@ -33,6 +33,15 @@ class TestFraudDetectionModel:
         assert FraudDetectionModel.get_risk_score(0.5) == 50
         assert FraudDetectionModel.get_risk_score(1.0) == 100
 
+    def test_risk_scores_vectorized(self):
+        """Test vectorized risk scores match the scalar version"""
+        probs = np.array([0.0, 0.123, 0.5, 0.999, 1.0])
+        scores = FraudDetectionModel.get_risk_scores(probs)
+
+        assert scores.tolist() == [
+            FraudDetectionModel.get_risk_score(p) for p in probs
+        ]
+
     def test_feature_names(self):
         """Test feature names are correctly defined"""
         model = FraudDetectionModel()
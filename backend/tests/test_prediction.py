@@ -100,3 +100,45 @@ class TestBatchPrediction:
             assert "fraud_count" in data
             assert "legitimate_count" in data
             assert "results" in data
+
+
+class TestPredictionHistoryPaging:
+    """Test keyset paging of prediction history"""
+
+    def test_history_pages_through_duplicate_timestamps(
+        self, client, auth_headers, db_session, test_user
+    ):
+        """Rows sharing one created_at (as a batch insert does) are all paged"""
+        from datetime import datetime
+        from app.db.models import Prediction
+
+        created_at = datetime(2024, 1, 1, 12, 0, 0)
+        db_session.add_all([
+            Prediction(
+                user_id=test_user.id, time=float(i), amount=1.0, is_fraud=False,
+                fraud_probability=0.1, confidence="High", risk_score=10,
+                prediction_time_ms=0.0, features_json="{}",
+                created_at=created_at, batch_id="batch"
+            )
+            for i in range(25)
+        ])
+        db_session.commit()
+
+        seen = []
+        params = {"limit": 10}
+        while True:
+            response = client.get(
+                "/api/v1/predict/history", headers=auth_headers, params=params
+            )
+            assert response.status_code == 200
+            seen.extend(row["id"] for row in response.json())
+            if "X-Next-Before" not in response.headers:
+                break
+            params = {
+                "limit": 10,
+                "before": response.headers["X-Next-Before"],
+                "before_id": response.headers["X-Next-Before-Id"],
+            }
+
+        assert len(seen) == 25
+        assert seen == sorted(set(seen), reverse=True)
@@ -0,0 +1,160 @@
+"""Tests for the heap-based task scheduler"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.scheduler_service import ScheduleFrequency, SchedulerService
+
+
+def past(seconds: float = 1) -> datetime:
+    return datetime.utcnow() - timedelta(seconds=seconds)
+
+
+def future(hours: float = 1) -> datetime:
+    return datetime.utcnow() + timedelta(hours=hours)
+
+
+class Recorder:
+    """Task function that records which task ran and signals each run"""
+
+    def __init__(self):
+        self.calls = []
+        self.ran = asyncio.Event()
+
+    def __call__(self, name: str):
+        def run():
+            self.calls.append(name)
+            self.ran.set()
+        return run
+
+    async def wait(self, count: int, timeout: float = 2.0):
+        async def until_count():
+            while len(self.calls) < count:
+                self.ran.clear()
+                await self.ran.wait()
+        await asyncio.wait_for(until_count(), timeout)
+
+
+class TestScheduler:
+    """Test scheduling, removal and the wakeup path"""
+
+    @pytest.mark.asyncio
+    async def test_due_tasks_run_in_next_run_order(self):
+        """Test tasks run earliest-first regardless of insertion order"""
+        scheduler = SchedulerService()
+        recorder = Recorder()
+        scheduler.add_task("late", "late", recorder("late"), ScheduleFrequency.DAILY, start_time=past(1))
+        scheduler.add_task("early", "early", recorder("early"), ScheduleFrequency.DAILY, start_time=past(3))
+        scheduler.add_task("idle", "idle", recorder("idle"), ScheduleFrequency.DAILY, start_time=future())
+
+        await scheduler.start()
+        try:
+            await recorder.wait(2)
+            await asyncio.sleep(0.05)
+        finally:
+            await scheduler.stop()
+
+        assert recorder.calls == ["early", "late"]
+        # A completed task is queued again for its next period
+        assert scheduler.tasks["early"].run_count == 1
+        assert scheduler._pending["early"] > datetime.utcnow()
+
+    @pytest.mark.asyncio
+    async def test_removed_task_does_not_run(self):
+        """Test removing a task leaves its heap entry to be skipped"""
+        scheduler = SchedulerService()
+        recorder = Recorder()
+        scheduler.add_task("gone", "gone", recorder("gone"), ScheduleFrequency.HOURLY, start_time=past(2))
+        scheduler.add_task("kept", "kept", recorder("kept"), ScheduleFrequency.HOURLY, start_time=past(1))
+
+        assert scheduler.remove_task("gone") is True
+        assert scheduler.remove_task("gone") is False
+        assert "gone" not in scheduler._pending
+        assert len(scheduler._heap) == 2
+
+        await scheduler.start()
+        try:
+            await recorder.wait(1)
+            await asyncio.sleep(0.05)
+        finally:
+            await scheduler.stop()
+
+        assert recorder.calls == ["kept"]
+
+    @pytest.mark.asyncio
+    async def test_rescheduled_task_skips_stale_entry(self):
+        """Test re-adding a task only honours its latest next_run"""
+        scheduler = SchedulerService()
+        recorder = Recorder()
+        scheduler.add_task("job", "job", recorder("old"), ScheduleFrequency.HOURLY, start_time=past(2))
+        new_run = past(1)
+        scheduler.add_task("job", "job", recorder("new"), ScheduleFrequency.HOURLY, start_time=new_run)
+
+        # Both heap entries remain; _pending marks which one is live
+        assert len(scheduler._heap) == 2
+        assert scheduler._pending["job"] == new_run
+
+        await scheduler.start()
+        try:
+            await recorder.wait(1)
+            await asyncio.sleep(0.05)
+        finally:
+            await scheduler.stop()
+
+        assert recorder.calls == ["new"]
+
+    @pytest.mark.asyncio
+    async def test_add_task_wakes_idle_scheduler(self):
+        """Test a task added to an empty scheduler runs without polling"""
+        scheduler = SchedulerService()
+        recorder = Recorder()
+
+        await scheduler.start()
+        try:
+            await asyncio.sleep(0.05)  # loop is now waiting on the wakeup event
+            scheduler.add_task("job", "job", recorder("job"), ScheduleFrequency.DAILY, start_time=past())
+            await recorder.wait(1, timeout=1.0)
+        finally:
+            await scheduler.stop()
+
+        assert recorder.calls == ["job"]
+
+    @pytest.mark.asyncio
+    async def test_add_task_interrupts_sleep_for_later_head(self):
+        """Test an earlier task preempts a sleep on a task due much later"""
+        scheduler = SchedulerService()
+        recorder = Recorder()
+        scheduler.add_task("later", "later", recorder("later"), ScheduleFrequency.DAILY, start_time=future())
+
+        await scheduler.start()
+        try:
+            await asyncio.sleep(0.05)  # loop is sleeping until "later" is due
+            scheduler.add_task("now", "now", recorder("now"), ScheduleFrequency.DAILY, start_time=past())
+            await recorder.wait(1, timeout=1.0)
+        finally:
+            await scheduler.stop()
+
+        assert recorder.calls == ["now"]
+
+    @pytest.mark.asyncio
+    async def test_paused_task_is_dropped_until_resumed(self):
+        """Test a paused task leaves the queue and resume re-queues it"""
+        scheduler = SchedulerService()
+        recorder = Recorder()
+        scheduler.add_task("job", "job", recorder("job"), ScheduleFrequency.DAILY, start_time=past())
+        scheduler.pause_task("job")
+
+        await scheduler.start()
+        try:
+            await asyncio.sleep(0.05)
+            assert recorder.calls == []
+            assert "job" not in scheduler._pending
+
+            scheduler.resume_task("job")
+            await recorder.wait(1, timeout=1.0)
+        finally:
+            await scheduler.stop()
+
+        assert recorder.calls == ["job"]
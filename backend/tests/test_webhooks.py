@@ -0,0 +1,189 @@
+"""Tests for background webhook redelivery"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import Webhook
+from app.services import webhook_service
+from app.services.webhook_service import (
+    DISABLE_AFTER_FAILURES,
+    RETRY_BASE_DELAY_SECONDS,
+    WEBHOOK_MAX_ATTEMPTS,
+    WebhookRetryQueue,
+    WebhookService,
+)
+
+
+@pytest.fixture
+def fixed_clock(monkeypatch):
+    """Freeze monotonic time and remove retry jitter"""
+    monkeypatch.setattr(webhook_service.time, "monotonic", lambda: 1000.0)
+    monkeypatch.setattr(webhook_service.random, "random", lambda: 0.0)
+    return 1000.0
+
+
+@pytest.fixture
+def webhook(db_session, test_user):
+    hook = Webhook(
+        user_id=test_user.id,
+        name="alerts",
+        url="https://hooks.example.com/fraud",
+        event_types=json.dumps(["fraud_detected"]),
+    )
+    db_session.add(hook)
+    db_session.commit()
+    return hook
+
+
+@pytest.fixture
+def endpoint(monkeypatch, db_session):
+    """Route deliveries to an in-process endpoint with a settable status"""
+    state = {"status": 500, "by_url": {}, "requests": []}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        state["requests"].append(request)
+        return httpx.Response(state["by_url"].get(str(request.url), state["status"]))
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(WebhookService, "_client", client)
+    monkeypatch.setattr(
+        webhook_service, "SessionLocal", sessionmaker(bind=db_session.get_bind())
+    )
+    return state
+
+
+def running_queue() -> WebhookRetryQueue:
+    queue = WebhookRetryQueue()
+    queue.running = True  # accept retries without starting the loop
+    return queue
+
+
+class TestWebhookRetryQueue:
+    """Test backoff, attempt limits and disabling failing webhooks"""
+
+    def test_backoff_doubles_per_attempt(self, fixed_clock):
+        """Test retry n is due base * 2**(n-1) seconds out"""
+        queue = running_queue()
+        for attempts in (1, 2, 3, 4):
+            assert queue.schedule(7, b"{}", {}, attempts) is True
+
+        delays = sorted(entry[0] - fixed_clock for entry in queue._heap)
+        assert delays == [RETRY_BASE_DELAY_SECONDS * 2 ** n for n in range(4)]
+
+    def test_attempt_cap(self, fixed_clock):
+        """Test no retry is queued once the attempt limit is reached"""
+        queue = running_queue()
+        assert queue.schedule(7, b"{}", {}, WEBHOOK_MAX_ATTEMPTS - 1) is True
+        assert queue.schedule(7, b"{}", {}, WEBHOOK_MAX_ATTEMPTS) is False
+        assert len(queue._heap) == 1
+
+    def test_stopped_queue_and_full_queue_refuse(self, fixed_clock, monkeypatch):
+        """Test retries are refused when stopped or at capacity"""
+        assert WebhookRetryQueue().schedule(7, b"{}", {}, 1) is False
+
+        monkeypatch.setattr(webhook_service, "MAX_PENDING_RETRIES", 2)
+        queue = running_queue()
+        assert queue.schedule(7, b"{}", {}, 1) is True
+        assert queue.schedule(8, b"{}", {}, 1) is True
+        assert queue.schedule(9, b"{}", {}, 1) is False
+
+    @pytest.mark.asyncio
+    async def test_retryable_failure_is_rescheduled(self, webhook, endpoint, db_session, fixed_clock):
+        """Test a 5xx redelivery queues the next attempt"""
+        queue = running_queue()
+        await queue._redeliver(webhook.id, b"{}", {"X-Test": "1"}, 1)
+
+        assert endpoint["requests"][0].headers["X-Webhook-Attempt"] == "2"
+        assert [entry[-1] for entry in queue._heap] == [2]
+        db_session.expire_all()
+        assert webhook.failure_count == 1
+        assert webhook.is_active is True
+
+    @pytest.mark.asyncio
+    async def test_client_error_is_not_retried(self, webhook, endpoint, fixed_clock):
+        """Test a 4xx response is final"""
+        endpoint["status"] = 404
+        queue = running_queue()
+        await queue._redeliver(webhook.id, b"{}", {}, 1)
+
+        assert len(endpoint["requests"]) == 1
+        assert queue._heap == []
+
+    @pytest.mark.asyncio
+    async def test_webhook_disabled_after_repeated_failures(self, webhook, endpoint, db_session, fixed_clock):
+        """Test a webhook past the failure limit is deactivated, not retried"""
+        webhook.failure_count = DISABLE_AFTER_FAILURES
+        db_session.commit()
+
+        queue = running_queue()
+        await queue._redeliver(webhook.id, b"{}", {}, 1)
+
+        db_session.expire_all()
+        assert webhook.failure_count == DISABLE_AFTER_FAILURES + 1
+        assert webhook.is_active is False
+        assert queue._heap == []
+
+        # Inactive webhooks are skipped without a request
+        await queue._redeliver(webhook.id, b"{}", {}, 2)
+        assert len(endpoint["requests"]) == 1
+
+    @pytest.mark.asyncio
+    async def test_loop_redelivers_when_due(self, webhook, endpoint, monkeypatch):
+        """Test the background loop sends a retry once it falls due"""
+        endpoint["status"] = 200
+        monkeypatch.setattr(webhook_service, "RETRY_BASE_DELAY_SECONDS", 0.01)
+        monkeypatch.setattr(webhook_service.random, "random", lambda: 0.0)
+
+        queue = WebhookRetryQueue()
+        await queue.start()
+        try:
+            assert queue.schedule(webhook.id, b"{}", {}, 1) is True
+            for _ in range(100):
+                if endpoint["requests"]:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await queue.stop()
+
+        assert len(endpoint["requests"]) == 1
+
+
+class TestWebhookFanOut:
+    """Test concurrent delivery of one event to several webhooks"""
+
+    @pytest.mark.asyncio
+    async def test_fan_out_commits_once(self, webhook, endpoint, db_session, test_user):
+        """Test every outcome is recorded and committed together"""
+        healthy = Webhook(
+            user_id=test_user.id,
+            name="healthy",
+            url="https://hooks.example.com/ok",
+            event_types=json.dumps(["fraud_detected"]),
+        )
+        db_session.add(healthy)
+        db_session.commit()
+        endpoint["by_url"][healthy.url] = 200
+
+        commits = []
+
+        def on_commit(session):
+            commits.append(session)
+
+        event.listen(db_session, "after_commit", on_commit)
+        try:
+            result = await WebhookService.trigger_webhooks_for_event(
+                db_session, test_user.id, "fraud_detected", {"amount": 1.0}
+            )
+        finally:
+            event.remove(db_session, "after_commit", on_commit)
+
+        assert len(commits) == 1
+        assert len(endpoint["requests"]) == 2
+        assert result == {"success": 1, "failed": 1, "skipped": 0}
+        assert (webhook.failure_count, webhook.last_status_code) == (1, 500)
+        assert (healthy.failure_count, healthy.last_status_code) == (0, 200)